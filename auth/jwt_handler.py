@@ -1,6 +1,11 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from utils.cache import TTLCache
+import os
+import time
 
 # Change these in production and store in environment variables
 SECRET_KEY = "your-secret-key-here"
@@ -24,3 +29,40 @@ def verify_token(token: str):
         return payload
     except JWTError:
         return None
+
+# Tokens that already passed signature verification, so repeated requests from
+# the same session skip the decode. Entries never outlive the token's exp.
+verified_token_cache = TTLCache(
+    maxsize=int(os.getenv("TOKEN_CACHE_MAXSIZE", "10000")),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL", "300"))
+)
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def verify_token_cached(token: str):
+    payload = verified_token_cache.get(token)
+    if payload is not None:
+        return payload
+
+    payload = verify_token(token)
+    if payload is None:
+        return None
+
+    ttl = verified_token_cache.ttl
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        verified_token_cache.set(token, payload, ttl=ttl)
+    return payload
+
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> dict:
+    """FastAPI dependency that requires a valid bearer token and returns its payload"""
+    payload = verify_token_cached(credentials.credentials) if credentials else None
+    if payload is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or missing authentication token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return payload
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+# bcrypt releases the GIL while hashing, so a small thread pool gives real
+# parallelism without blocking the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash/verify calls allowed to wait or run at once before new ones are rejected
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+# Password hashing context
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_lock = threading.Lock()
+_pending = 0
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "rejected": 0,
+    "total_seconds": 0.0,
+    "max_pending": 0,
+}
+
+def _timed(func, *args):
+    start = time.monotonic()
+    try:
+        return func(*args)
+    finally:
+        with _lock:
+            _stats["total_seconds"] += time.monotonic() - start
+
+def _on_done(_future):
+    global _pending
+    with _lock:
+        _pending -= 1
+        _stats["completed"] += 1
+
+async def _run(func, *args):
+    """Run a bcrypt operation on the hashing pool, rejecting work when the queue is full"""
+    global _pending
+    with _lock:
+        if _pending >= PASSWORD_HASH_MAX_PENDING:
+            _stats["rejected"] += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"}
+            )
+        _pending += 1
+        _stats["submitted"] += 1
+        _stats["max_pending"] = max(_stats["max_pending"], _pending)
+    # Track completion on the worker future itself so a cancelled request
+    # still frees its slot only once the hash has actually finished
+    future = _executor.submit(_timed, func, *args)
+    future.add_done_callback(_on_done)
+    return await asyncio.wrap_future(future)
+
+async def hash_password(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await _run(pwd_context.hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop"""
+    return await _run(pwd_context.verify, plain_password, hashed_password)
+
+def password_hasher_stats():
+    """Return a snapshot of hashing pool metrics"""
+    with _lock:
+        stats = dict(_stats)
+        stats.update({
+            "workers": PASSWORD_HASH_WORKERS,
+            "max_pending_allowed": PASSWORD_HASH_MAX_PENDING,
+            "pending": _pending,
+            "avg_seconds": stats["total_seconds"] / stats["completed"] if stats["completed"] else 0.0,
+        })
+    return stats
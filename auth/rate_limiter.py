@@ -0,0 +1,133 @@
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from fastapi import HTTPException, Request
+
+class RateLimitBackend(ABC):
+    """Storage for rate limit state.
+
+    The in-memory backend below is per process; a shared backend (e.g. Redis)
+    only needs to implement hit() and reset() with the same semantics.
+    """
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window: float) -> float | None:
+        """Record an attempt for key; return seconds to wait if over the limit, else None"""
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        """Forget all attempts recorded for key"""
+
+class InMemorySlidingWindowBackend(RateLimitBackend):
+    """Sliding-window log kept in process memory.
+
+    Each key stores at most `limit` timestamps and at most max_keys keys are
+    tracked; the least recently used key is dropped beyond that, so memory
+    stays bounded however many distinct emails or IPs are seen.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: float) -> float | None:
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._windows.get(key)
+            if attempts is None:
+                attempts = deque(maxlen=limit)
+                self._windows[key] = attempts
+                while len(self._windows) > self.max_keys:
+                    self._windows.popitem(last=False)
+            else:
+                self._windows.move_to_end(key)
+
+            while attempts and attempts[0] <= now - window:
+                attempts.popleft()
+            if len(attempts) >= limit:
+                return attempts[0] + window - now
+            attempts.append(now)
+            return None
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._windows.pop(key, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._windows)
+
+class SlidingWindowLimiter:
+    """Allow at most `limit` attempts per key within any `window` seconds"""
+
+    def __init__(self, name: str, limit: int, window: float, backend: RateLimitBackend):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.backend = backend
+        self.rejected = 0
+
+    def check(self, key: str) -> None:
+        """Record an attempt, raising 429 with Retry-After when the limit is exceeded"""
+        retry_after = self.backend.hit(f"{self.name}:{key}", self.limit, self.window)
+        if retry_after is not None:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many login attempts, please try again later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+
+    def reset(self, key: str) -> None:
+        self.backend.reset(f"{self.name}:{key}")
+
+# Peers allowed to set X-Forwarded-For (comma separated, "*" for any), same
+# meaning as uvicorn's --forwarded-allow-ips. Empty trusts no proxy.
+FORWARDED_ALLOW_IPS = {
+    ip.strip() for ip in os.getenv("FORWARDED_ALLOW_IPS", "").split(",") if ip.strip()
+}
+
+def _trusted_proxy(host: str) -> bool:
+    return "*" in FORWARDED_ALLOW_IPS or host in FORWARDED_ALLOW_IPS
+
+def client_ip(request: Request) -> str:
+    """Address of the client, read through X-Forwarded-For only from trusted proxies"""
+    host = request.client.host if request.client else "unknown"
+    if not _trusted_proxy(host):
+        return host
+    # Walk the chain from the nearest hop; the first untrusted entry is the client
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else host
+
+_login_backend = InMemorySlidingWindowBackend(
+    max_keys=int(os.getenv("LOGIN_RATE_LIMIT_MAX_KEYS", "100000"))
+)
+
+login_email_limiter = SlidingWindowLimiter(
+    "login-email",
+    limit=int(os.getenv("LOGIN_RATE_LIMIT_EMAIL_ATTEMPTS", "5")),
+    window=float(os.getenv("LOGIN_RATE_LIMIT_EMAIL_WINDOW", "60")),
+    backend=_login_backend
+)
+
+login_ip_limiter = SlidingWindowLimiter(
+    "login-ip",
+    limit=int(os.getenv("LOGIN_RATE_LIMIT_IP_ATTEMPTS", "20")),
+    window=float(os.getenv("LOGIN_RATE_LIMIT_IP_WINDOW", "60")),
+    backend=_login_backend
+)
+
+def login_rate_limit_stats():
+    """Return rejection counters for the login limiters"""
+    return {
+        "tracked_keys": len(_login_backend),
+        "rejected_by_email": login_email_limiter.rejected,
+        "rejected_by_ip": login_ip_limiter.rejected,
+    }
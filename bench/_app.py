@@ -0,0 +1,29 @@
+from datetime import timedelta
+import httpx
+from auth.jwt_handler import create_access_token
+from database import get_db_cursor
+
+def app_client() -> httpx.AsyncClient:
+    """In-process client for the real app, authenticated with a bench token"""
+    from main import app
+    token = create_access_token({"sub": "bench@example.com"}, expires_delta=timedelta(hours=1))
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://bench",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=300
+    )
+
+def create_bench_user(email: str | None = None, password_hash: str = "x") -> str:
+    with get_db_cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO users (fullName, email, password)
+            VALUES ('Bench User', COALESCE(%s, 'bench-' || uuid_generate_v4() || '@example.com'), %s)
+            RETURNING userid
+        """, [email, password_hash])
+        return str(cursor.fetchone()["userid"])
+
+def delete_bench_user(user_id: str):
+    with get_db_cursor() as cursor:
+        cursor.execute("DELETE FROM trips WHERE userid = %s", [user_id])
+        cursor.execute("DELETE FROM users WHERE userid = %s", [user_id])
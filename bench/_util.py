@@ -0,0 +1,21 @@
+import os
+import statistics
+import sys
+
+def require_database():
+    """Exit unless DATABASE_URL points at a database the benchmark may write to"""
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("Set DATABASE_URL to a disposable database to run this benchmark")
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def report(label: str, seconds: list):
+    """Print count, mean, p50 and p99 of a list of durations in milliseconds"""
+    print(
+        f"{label:<40} n={len(seconds):<6} "
+        f"mean={statistics.mean(seconds) * 1000:8.2f}ms "
+        f"p50={percentile(seconds, 0.5) * 1000:8.2f}ms "
+        f"p99={percentile(seconds, 0.99) * 1000:8.2f}ms"
+    )
@@ -0,0 +1,54 @@
+"""Trip import throughput: one POST /trips/ per trip vs a single POST /trips/bulk.
+
+    DATABASE_URL=... python -m bench.bulk_import
+"""
+import asyncio
+import time
+from datetime import date, timedelta
+from bench._app import app_client, create_bench_user, delete_bench_user
+from bench._util import require_database
+
+TRIPS = 2_000
+
+def _trips(user_id: str) -> list[dict]:
+    today = date.today()
+    return [
+        {
+            "userId": user_id,
+            "destinationName": f"Destination {index}",
+            "planDate": (today - timedelta(days=index)).isoformat(),
+            "startDate": today.isoformat(),
+            "endDate": (today + timedelta(days=7)).isoformat(),
+            "tripHighlights": "Museums, food and a day at the beach"
+        }
+        for index in range(TRIPS)
+    ]
+
+async def _single_inserts(user_id: str) -> float:
+    async with app_client() as client:
+        started = time.monotonic()
+        for trip in _trips(user_id):
+            response = await client.post("/trips/", json=trip)
+            response.raise_for_status()
+        return time.monotonic() - started
+
+async def _bulk_insert(user_id: str) -> float:
+    async with app_client() as client:
+        started = time.monotonic()
+        response = await client.post("/trips/bulk", json=_trips(user_id))
+        response.raise_for_status()
+        assert response.json()["inserted"] == TRIPS
+        return time.monotonic() - started
+
+def main():
+    require_database()
+    for label, load in (("POST /trips/ per trip", _single_inserts), ("POST /trips/bulk", _bulk_insert)):
+        user_id = create_bench_user()
+        try:
+            seconds = asyncio.run(load(user_id))
+        finally:
+            delete_bench_user(user_id)
+        print(f"{label:<24} {TRIPS} trips in {seconds:7.2f}s ({TRIPS / seconds:9.1f} trips/s)")
+
+if __name__ == "__main__":
+    main()
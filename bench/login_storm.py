@@ -0,0 +1,82 @@
+"""GET /trips/user/{id} latency while a storm of POST /users/login requests
+runs through the app, with bcrypt on the hashing pool vs inline on the event loop.
+
+The login limiters are raised for the run so every login reaches bcrypt.
+
+    DATABASE_URL=... python -m bench.login_storm
+"""
+import asyncio
+import time
+import uuid
+from datetime import date
+import routes.user
+from auth.password import pwd_context, verify_password
+from auth.rate_limiter import login_email_limiter, login_ip_limiter
+from bench._app import app_client, create_bench_user, delete_bench_user
+from bench._util import report, require_database
+from database import get_db_cursor
+
+LOGINS = 64
+LOGIN_CONCURRENCY = 16
+TRIPS = 20
+PASSWORD = "correct horse battery staple"
+
+async def _verify_inline(password: str, hashed: str) -> bool:
+    # What login did before the hashing pool: bcrypt directly on the event loop
+    return pwd_context.verify(password, hashed)
+
+def _insert_trips(user_id: str):
+    with get_db_cursor() as cursor:
+        for index in range(TRIPS):
+            cursor.execute("""
+                INSERT INTO trips (userId, destinationName, planDate, startDate, endDate)
+                VALUES (%s, %s, %s, %s, %s)
+            """, [user_id, f"Destination {index}", date.today(), date.today(), date.today()])
+
+async def _login_storm(client, email: str):
+    semaphore = asyncio.Semaphore(LOGIN_CONCURRENCY)
+
+    async def login():
+        async with semaphore:
+            response = await client.post("/users/login", json={"email": email, "password": PASSWORD})
+            response.raise_for_status()
+
+    await asyncio.gather(*[login() for _ in range(LOGINS)])
+
+async def _list_trips(client, user_id: str, stop: asyncio.Event) -> list:
+    durations = []
+    while not stop.is_set():
+        started = time.monotonic()
+        response = await client.get(f"/trips/user/{user_id}")
+        response.raise_for_status()
+        durations.append(time.monotonic() - started)
+    return durations
+
+async def _run(user_id: str, email: str) -> tuple[list, float]:
+    async with app_client() as client:
+        stop = asyncio.Event()
+        trips = asyncio.create_task(_list_trips(client, user_id, stop))
+        started = time.monotonic()
+        await _login_storm(client, email)
+        elapsed = time.monotonic() - started
+        stop.set()
+        return await trips, elapsed
+
+def main():
+    require_database()
+    login_ip_limiter.limit = login_email_limiter.limit = LOGINS * 10
+    email = f"bench-{uuid.uuid4()}@example.com"
+    user_id = create_bench_user(email=email, password_hash=pwd_context.hash(PASSWORD))
+    try:
+        _insert_trips(user_id)
+        for label, verify in (("hashing pool", verify_password), ("inline bcrypt", _verify_inline)):
+            routes.user.verify_password = verify
+            durations, elapsed = asyncio.run(_run(user_id, email))
+            print(f"{label}: {LOGINS} logins in {elapsed:.2f}s")
+            report(f"  GET /trips/user during storm ({label})", durations)
+    finally:
+        routes.user.verify_password = verify_password
+        delete_bench_user(user_id)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Serialize 10k trip rows the old way (dict rows + jsonable_encoder) and the new
+way (tuple rows into TripRecord + FastJSONResponse).
+
+    python -m bench.row_serialization
+"""
+import json
+import timeit
+from datetime import date, timedelta
+from uuid import uuid4
+from fastapi.encoders import jsonable_encoder
+from models.trip import TripRecord
+from utils.json_response import FastJSONResponse
+
+ROWS = 10_000
+COLUMNS = ["tripId", "userId", "destinationName", "planDate", "startDate", "endDate", "tripHighlights", "linkPdf", "imgLink"]
+
+def _rows() -> list[tuple]:
+    user_id = uuid4()
+    today = date.today()
+    return [
+        (
+            uuid4(), user_id, f"Destination {index}", today - timedelta(days=index),
+            today, today + timedelta(days=7), "Museums, food and a day at the beach",
+            None, f"https://api.example.com/images/{index:064x}"
+        )
+        for index in range(ROWS)
+    ]
+
+def dict_rows_with_jsonable_encoder(rows):
+    # What RealDictCursor and FastAPI's default response did per request
+    dict_rows = [dict(zip(COLUMNS, row)) for row in rows]
+    return json.dumps(jsonable_encoder({"trips": dict_rows})).encode("utf-8")
+
+def tuple_rows_with_fast_json(rows):
+    return FastJSONResponse({"trips": [TripRecord(*row) for row in rows]}).body
+
+def main():
+    rows = _rows()
+    assert json.loads(dict_rows_with_jsonable_encoder(rows)) == json.loads(tuple_rows_with_fast_json(rows))
+    for func in (dict_rows_with_jsonable_encoder, tuple_rows_with_fast_json):
+        seconds = min(timeit.repeat(lambda: func(rows), number=1, repeat=10))
+        print(f"{func.__name__:<35} {seconds * 1000:8.2f}ms per {ROWS} rows")
+
+if __name__ == "__main__":
+    main()
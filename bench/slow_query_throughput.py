@@ -0,0 +1,52 @@
+"""Requests served while one slow query runs, with the query blocking the event
+loop (the old sync cursor in an async handler) vs on the async cursor.
+
+    DATABASE_URL=... python -m bench.slow_query_throughput
+"""
+import asyncio
+import time
+from bench._app import app_client
+from bench._util import require_database
+from database import close_pool, get_async_db_cursor, get_db_cursor
+
+SLOW_QUERY_SECONDS = 2
+CLIENTS = 8
+
+async def _blocking_query():
+    with get_db_cursor() as cursor:
+        cursor.execute("SELECT pg_sleep(%s)", [SLOW_QUERY_SECONDS])
+
+async def _async_query():
+    async with get_async_db_cursor() as cursor:
+        await cursor.execute("SELECT pg_sleep(%s)", [SLOW_QUERY_SECONDS])
+
+async def _measure(slow_query) -> int:
+    served = 0
+    stop = asyncio.Event()
+
+    async def client_loop(client):
+        nonlocal served
+        while not stop.is_set():
+            await client.get("/")
+            served += 1
+
+    async with app_client() as client:
+        clients = [asyncio.create_task(client_loop(client)) for _ in range(CLIENTS)]
+        await asyncio.sleep(0.2)
+        served = 0
+        await slow_query()
+        stop.set()
+        await asyncio.gather(*clients)
+    return served
+
+def main():
+    require_database()
+    for label, slow_query in (("sync cursor on the event loop", _blocking_query), ("async cursor", _async_query)):
+        started = time.monotonic()
+        served = asyncio.run(_measure(slow_query))
+        elapsed = time.monotonic() - started
+        print(f"{label:<32} {served:6d} requests during a {SLOW_QUERY_SECONDS}s query ({served / elapsed:8.1f} req/s)")
+        close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Per-request cost of bearer token verification with and without the verified-token cache.
+
+    python -m bench.token_cache
+"""
+import timeit
+from datetime import timedelta
+from auth.jwt_handler import create_access_token, verify_token, verify_token_cached
+
+ITERATIONS = 20_000
+
+def main():
+    token = create_access_token(
+        {"sub": "bench@example.com", "user_id": "00000000-0000-0000-0000-000000000000"},
+        expires_delta=timedelta(minutes=30)
+    )
+    assert verify_token(token) == verify_token_cached(token)
+    for func in (verify_token, verify_token_cached):
+        seconds = min(timeit.repeat(lambda: func(token), number=ITERATIONS, repeat=5))
+        print(f"{func.__name__:<22} {seconds / ITERATIONS * 1_000_000:8.2f}us per request")
+
+if __name__ == "__main__":
+    main()
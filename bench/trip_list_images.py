@@ -0,0 +1,68 @@
+"""GET /trips/user/{id} latency and size with images inline in trips.imgLink
+(before migration 3) vs referenced by hash from the images table.
+
+    DATABASE_URL=... python -m bench.trip_list_images
+"""
+import asyncio
+import hashlib
+import os
+import time
+from datetime import date
+from bench._app import app_client, create_bench_user, delete_bench_user
+from bench._util import report, require_database
+from database import get_db_cursor
+from utils.data_uri import to_data_uri
+
+TRIPS = 50
+IMAGE_BYTES = 1024 * 1024
+REQUESTS = 20
+
+def _insert_trips(user_id: str, images: list[bytes], inline: bool):
+    with get_db_cursor() as cursor:
+        cursor.execute("DELETE FROM trips WHERE userid = %s", [user_id])
+        for index, data in enumerate(images):
+            content_hash = hashlib.sha256(data).hexdigest()
+            if not inline:
+                cursor.execute("""
+                    INSERT INTO images (contentHash, mimeType, data)
+                    VALUES (%s, 'image/png', %s)
+                    ON CONFLICT (contentHash) DO NOTHING
+                """, [content_hash, data])
+            cursor.execute("""
+                INSERT INTO trips (userId, destinationName, planDate, startDate, endDate, imgLink, imageHash)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, [
+                user_id, f"Destination {index}", date.today(), date.today(), date.today(),
+                to_data_uri(data, "image/png") if inline else None,
+                None if inline else content_hash
+            ])
+
+async def _list_trips(user_id: str) -> tuple[list, int]:
+    durations = []
+    async with app_client() as client:
+        for _ in range(REQUESTS):
+            started = time.monotonic()
+            response = await client.get(f"/trips/user/{user_id}", params={"limit": TRIPS})
+            response.raise_for_status()
+            durations.append(time.monotonic() - started)
+    return durations, len(response.content)
+
+def main():
+    require_database()
+    images = [os.urandom(IMAGE_BYTES) for _ in range(TRIPS)]
+    user_id = create_bench_user()
+    try:
+        for label, inline in (("data URIs in trips.imgLink", True), ("hashes into the images table", False)):
+            _insert_trips(user_id, images, inline)
+            durations, size = asyncio.run(_list_trips(user_id))
+            report(f"{label} ({size / 1024:,.0f} KiB)", durations)
+    finally:
+        delete_bench_user(user_id)
+        with get_db_cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM images WHERE contentHash = ANY(%s)",
+                [[hashlib.sha256(data).hexdigest() for data in images]]
+            )
+
+if __name__ == "__main__":
+    main()
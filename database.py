@@ -1,14 +1,27 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from dotenv import load_dotenv
 import os
-from contextlib import contextmanager
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, asynccontextmanager
 
 load_dotenv()
 
 # Get database connection details from environment variables
 DATABASE_URL = os.getenv("DATABASE_URL")  # Neon DB connection string
 
+# Connection pool settings
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))  # Recycle connections older than this
+DB_POOL_HEALTH_CHECK_IDLE = float(os.getenv("DB_POOL_HEALTH_CHECK_IDLE", "30"))  # Ping connections idle longer than this
+
 def get_db_connection():
     """Create a new database connection"""
     try:
@@ -18,71 +31,372 @@ def get_db_connection():
         print(f"Error connecting to the database: {e}")
         raise
 
+class _PooledConnection:
+    """A connection together with the bookkeeping the pool needs"""
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the pool timeout"""
+
+class ConnectionPool:
+    """Thread-safe pool of psycopg2 connections.
+
+    Connections are checked for health when they are handed out, recycled once
+    they exceed the maximum lifetime and the time callers spend waiting for a
+    free connection is recorded.
+    """
+
+    def __init__(self, min_size, max_size, timeout, max_lifetime, health_check_idle):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size: require 0 <= min_size <= max_size and max_size >= 1")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_idle = health_check_idle
+
+        self._idle = deque()
+        self._in_use = {}
+        self._opening = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_recycled": 0,
+            "connections_discarded": 0,
+        }
+
+        for _ in range(min_size):
+            self._idle.append(self._open())
+
+    def _open(self):
+        pooled = _PooledConnection(get_db_connection())
+        with self._cond:
+            self._stats["connections_created"] += 1
+        return pooled
+
+    def _close(self, pooled):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+    def _size(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def _is_usable(self, pooled):
+        """Return True if an idle connection can be handed out again"""
+        now = time.monotonic()
+        if pooled.conn.closed:
+            return False
+        if self.max_lifetime and now - pooled.created_at > self.max_lifetime:
+            with self._cond:
+                self._stats["connections_recycled"] += 1
+            return False
+        if now - pooled.last_used > self.health_check_idle:
+            try:
+                with pooled.conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                pooled.conn.rollback()
+            except Exception as e:
+                print(f"Discarding unhealthy database connection: {e}")
+                return False
+        return True
+
+    def getconn(self):
+        """Check a connection out of the pool, opening a new one if allowed"""
+        start = time.monotonic()
+        waited = False
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise psycopg2.InterfaceError("Connection pool is closed")
+                    if self._idle:
+                        pooled = self._idle.pop()
+                        should_open = False
+                        break
+                    if self._size() < self.max_size:
+                        self._opening += 1
+                        pooled = None
+                        should_open = True
+                        break
+                    remaining = self.timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.timeout}s waiting for a database connection"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+            if should_open:
+                try:
+                    pooled = self._open()
+                finally:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+            elif not self._is_usable(pooled):
+                self._close(pooled)
+                with self._cond:
+                    self._stats["connections_discarded"] += 1
+                    self._cond.notify()
+                continue
+
+            wait_seconds = time.monotonic() - start
+            with self._cond:
+                self._in_use[id(pooled.conn)] = pooled
+                self._stats["checkouts"] += 1
+                if waited:
+                    self._stats["waits"] += 1
+                self._stats["total_wait_seconds"] += wait_seconds
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait_seconds)
+            return pooled.conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, or close it if it is no longer reusable"""
+        with self._cond:
+            pooled = self._in_use.pop(id(conn), None)
+        if pooled is None:
+            conn.close()
+            return
+
+        if not discard and not conn.closed:
+            # Never hand out a connection with an open or failed transaction
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+
+        with self._cond:
+            if discard or conn.closed or self._closed:
+                self._stats["connections_discarded"] += 1
+                keep = False
+            else:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+                keep = True
+            self._cond.notify()
+        if not keep:
+            self._close(pooled)
+
+    def stats(self):
+        """Return a snapshot of pool usage and wait metrics"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "avg_wait_seconds": (
+                    stats["total_wait_seconds"] / stats["checkouts"] if stats["checkouts"] else 0.0
+                ),
+            })
+        return stats
+
+    def close(self):
+        """Close all idle connections and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close(pooled)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    max_lifetime=DB_POOL_MAX_LIFETIME,
+                    health_check_idle=DB_POOL_HEALTH_CHECK_IDLE,
+                )
+    return _pool
+
+def get_pool_stats():
+    """Return pool metrics, or None if the pool has not been created yet"""
+    return _pool.stats() if _pool is not None else None
+
+def close_pool():
+    """Close the connection pool (used on application shutdown)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
 @contextmanager
-def get_db_cursor():
-    """Context manager for database operations"""
-    conn = get_db_connection()
+def get_db_cursor(name=None, itersize=2000):
+    """Context manager for database operations
+
+    Pass a name to get a server-side cursor, which streams the result set in
+    batches of itersize rows instead of loading it all into memory.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    discard = False
+    cursor = None
     try:
-        cursor = conn.cursor()
+        if name:
+            cursor = conn.cursor(name=name)
+            cursor.itersize = itersize
+        else:
+            cursor = conn.cursor()
         yield cursor
         conn.commit()
     except Exception as e:
-        conn.rollback()
+        try:
+            conn.rollback()
+        except Exception:
+            discard = True
+        if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+            discard = True
         raise
     finally:
-        cursor.close()
-        conn.close()
+        if cursor is not None:
+            cursor.close()
+        pool.putconn(conn, discard=discard)
+
+# Blocking database calls from async handlers run here so they never stall the
+# event loop. One worker per pooled connection is enough: extra workers would
+# only queue up waiting for a free connection.
+_db_executor = ThreadPoolExecutor(max_workers=DB_POOL_MAX_SIZE, thread_name_prefix="db")
+
+async def run_in_db_executor(func, *args, **kwargs):
+    """Run a blocking database call on the database thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(func, *args, **kwargs))
+
+class AsyncCursor:
+    """Awaitable wrapper around a psycopg2 cursor.
+
+    Every call is executed on the database thread pool. If the awaiting task is
+    cancelled the underlying call keeps running, so it is tracked and awaited
+    before the connection is released.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._pending = None
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        self._pending = loop.run_in_executor(_db_executor, functools.partial(func, *args, **kwargs))
+        return await asyncio.shield(self._pending)
+
+    async def _wait_pending(self):
+        if self._pending is not None and not self._pending.done():
+            await asyncio.wait([self._pending])
+
+    async def execute(self, query, vars=None):
+        return await self._run(self._cursor.execute, query, vars)
+
+    async def fetchone(self):
+        return await self._run(self._cursor.fetchone)
+
+    async def fetchmany(self, size=None):
+        if size is None:
+            return await self._run(self._cursor.fetchmany)
+        return await self._run(self._cursor.fetchmany, size)
+
+    async def fetchall(self):
+        return await self._run(self._cursor.fetchall)
+
+    async def execute_values(self, query, argslist, template=None, page_size=100, fetch=False):
+        """Multi-row insert via psycopg2.extras.execute_values"""
+        return await self._run(execute_values, self._cursor, query, argslist, template, page_size, fetch)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+# Bounds the number of async units of work holding or acquiring a connection.
+# Waiting happens here on the event loop rather than inside an executor thread,
+# so queued checkouts can never occupy the workers that in-flight queries need.
+_async_checkout_slots = asyncio.Semaphore(DB_POOL_MAX_SIZE)
+
+async def _checkout_async(pool):
+    loop = asyncio.get_running_loop()
+    checkout = loop.run_in_executor(_db_executor, pool.getconn)
+    try:
+        return await asyncio.shield(checkout)
+    except asyncio.CancelledError:
+        # The checkout still completes in the background; hand the connection back
+        def _release(fut):
+            if not fut.cancelled() and fut.exception() is None:
+                pool.putconn(fut.result())
+        checkout.add_done_callback(_release)
+        raise
+
+@asynccontextmanager
+async def get_async_db_cursor(cursor_factory=None):
+    """Async context manager for database operations.
+
+    Same semantics as get_db_cursor(): commit on success, rollback on error,
+    connection returned to the pool afterwards. Pass
+    cursor_factory=psycopg2.extensions.cursor for plain tuple rows, which are
+    cheaper to build than the default dict rows.
+    """
+    pool = get_pool()
+    async with _async_checkout_slots:
+        conn = await _checkout_async(pool)
+        discard = False
+        cursor = None
+        async_cursor = None
+        try:
+            cursor = conn.cursor(cursor_factory=cursor_factory) if cursor_factory else conn.cursor()
+            async_cursor = AsyncCursor(cursor)
+            yield async_cursor
+            await async_cursor._run(conn.commit)
+        except BaseException as e:
+            if async_cursor is not None:
+                await async_cursor._wait_pending()
+            try:
+                await run_in_db_executor(conn.rollback)
+            except Exception:
+                discard = True
+            if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+                discard = True
+            raise
+        finally:
+            if async_cursor is not None:
+                await async_cursor._wait_pending()
+            if cursor is not None:
+                cursor.close()
+            pool.putconn(conn, discard=discard)
 
 # Initialize database tables
 def init_db():
-    with get_db_cursor() as cursor:
-        # Drop existing tables due to dependencies
-        cursor.execute("DROP TABLE IF EXISTS trips")
-        cursor.execute("DROP TABLE IF EXISTS users")
-        
-        # Create UUID extension if not exists
-        cursor.execute("CREATE EXTENSION IF NOT EXISTS \"uuid-ossp\"")
-        
-        # Create User table with UUID
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                userID UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-                fullName VARCHAR(100) NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                address VARCHAR(255),
-                phoneNumber VARCHAR(20)
-            )
-        """)
-
-        # Create Trip table with UUID
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS trips (
-                tripID UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-                userID UUID REFERENCES users(userID),
-                destinationName VARCHAR(100) NOT NULL,
-                planDate DATE NOT NULL,
-                startDate DATE NOT NULL,
-                endDate DATE NOT NULL,
-                tripHighlights TEXT,
-                linkPdf VARCHAR(255),
-                imgLink TEXT
-            )
-        """)
-        
-        # Add imgLink column to existing trips table if it doesn't exist
-        cursor.execute("""
-            DO $$ 
-            BEGIN 
-                IF NOT EXISTS (
-                    SELECT 1 
-                    FROM information_schema.columns 
-                    WHERE table_name='trips' AND column_name='imglink'
-                ) THEN 
-                    ALTER TABLE trips ADD COLUMN imgLink VARCHAR(500);
-                END IF;
-            END $$;
-        """)
+    """Bring the schema up to date without dropping existing data"""
+    from migrations import run_migrations
+    return run_migrations()
 
 # Call init_db() when running this file directly
 if __name__ == "__main__":
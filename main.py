@@ -1,9 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from routes import user, trip, openai_route, recommendation_route, webhook, gemini_route
+from routes import user, trip, openai_route, recommendation_route, webhook, gemini_route, metrics, image_route
+from database import close_pool
+from utils.image_cache import bind_request_base_url, image_cache
+from utils.image_jobs import image_jobs
 import os
 
-app = FastAPI(title="AI Travel Planner API")
+app = FastAPI(
+    title="AI Travel Planner API",
+    # Lets image URLs in responses be built from the request's own origin
+    dependencies=[Depends(bind_request_base_url)]
+)
 
 # Load environment variables
 FRONTEND_URL = os.getenv("FRONTEND_URL")
@@ -24,6 +31,20 @@ app.include_router(openai_route.router)
 app.include_router(recommendation_route.router)
 app.include_router(webhook.router)
 app.include_router(gemini_route.router)
+app.include_router(metrics.router)
+app.include_router(image_route.router)
+
+@app.on_event("shutdown")
+def shutdown_db_pool():
+    close_pool()
+
+@app.on_event("shutdown")
+async def shutdown_image_jobs():
+    await image_jobs.close()
+
+@app.on_event("shutdown")
+def flush_image_cache_index():
+    image_cache.flush()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,158 @@
+import hashlib
+from database import get_db_cursor
+from utils.data_uri import parse_data_uri
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent deploys apply
+# migrations one at a time
+MIGRATION_LOCK_ID = 727_001
+
+def _move_trip_images_to_images_table(cursor):
+    """Create the deduplicated image table and move inline data: URIs out of trips"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS images (
+            contentHash CHAR(64) PRIMARY KEY,
+            mimeType VARCHAR(100) NOT NULL,
+            data BYTEA NOT NULL,
+            createdAt TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    cursor.execute("ALTER TABLE trips ADD COLUMN IF NOT EXISTS imageHash CHAR(64) REFERENCES images(contentHash)")
+
+    # Rewrite in small batches by tripid so only a few images are in memory at once
+    moved = 0
+    last_trip_id = None
+    while True:
+        cursor.execute("""
+            SELECT tripid, imglink
+            FROM trips
+            WHERE imglink LIKE 'data:%%'
+              AND (%s::uuid IS NULL OR tripid > %s::uuid)
+            ORDER BY tripid
+            LIMIT 50
+        """, [last_trip_id, last_trip_id])
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        for row in rows:
+            last_trip_id = str(row["tripid"])
+            parsed = parse_data_uri(row["imglink"])
+            if parsed is None:
+                print(f"Leaving malformed image data URI on trip {last_trip_id}")
+                continue
+            data, mime_type = parsed
+            content_hash = hashlib.sha256(data).hexdigest()
+            cursor.execute("""
+                INSERT INTO images (contentHash, mimeType, data)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (contentHash) DO NOTHING
+            """, [content_hash, mime_type, data])
+            cursor.execute(
+                "UPDATE trips SET imageHash = %s, imgLink = NULL WHERE tripid = %s",
+                [content_hash, last_trip_id]
+            )
+            moved += 1
+    print(f"Moved {moved} inline trip images into the images table")
+
+def _make_email_lookup_unique(cursor):
+    """Enforce email uniqueness ignoring case, which the lower(email) lookups rely on.
+
+    Existing accounts whose emails differ only in case must be merged or
+    renamed by hand first (see README); until then this raises, which also
+    rolls back every other migration pending in the same run.
+    """
+    cursor.execute("""
+        SELECT lower(email) AS email, count(*) AS accounts
+        FROM users
+        GROUP BY lower(email)
+        HAVING count(*) > 1
+        ORDER BY lower(email)
+    """)
+    duplicates = cursor.fetchall()
+    if duplicates:
+        for row in duplicates:
+            print(f"Email {row['email']} is registered {row['accounts']} times with different case")
+        raise RuntimeError(
+            f"{len(duplicates)} emails are registered more than once ignoring case; "
+            "merge or rename those accounts (see README), then run the migrations again; "
+            "no pending migration was applied"
+        )
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_lower_unique ON users (lower(email))")
+    # The unique index serves the same lookups
+    cursor.execute("DROP INDEX IF EXISTS idx_users_email_lower")
+
+# Ordered list of (version, description, statements). A migration may also be
+# a callable taking the cursor when plain SQL is not enough. Never edit a
+# migration once it has shipped; add a new one instead.
+MIGRATIONS = [
+    (1, "Create users and trips tables", [
+        "CREATE EXTENSION IF NOT EXISTS \"uuid-ossp\"",
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            userID UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+            fullName VARCHAR(100) NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            address VARCHAR(255),
+            phoneNumber VARCHAR(20)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS trips (
+            tripID UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+            userID UUID REFERENCES users(userID),
+            destinationName VARCHAR(100) NOT NULL,
+            planDate DATE NOT NULL,
+            startDate DATE NOT NULL,
+            endDate DATE NOT NULL,
+            tripHighlights TEXT,
+            linkPdf VARCHAR(255),
+            imgLink TEXT
+        )
+        """,
+        # Databases created before imgLink existed
+        "ALTER TABLE trips ADD COLUMN IF NOT EXISTS imgLink TEXT",
+    ]),
+    (2, "Index trip listing and case-insensitive email lookup", [
+        # get_user_trips filters on userid and sorts by plandate, tripid
+        "CREATE INDEX IF NOT EXISTS idx_trips_userid_plandate ON trips (userid, plandate DESC, tripid DESC)",
+        # login and get_user look users up by lower(email)
+        "CREATE INDEX IF NOT EXISTS idx_users_email_lower ON users (lower(email))",
+    ]),
+    (3, "Move inline trip images into a deduplicated images table", _move_trip_images_to_images_table),
+    (4, "Make case-insensitive email lookup unique", _make_email_lookup_unique),
+]
+
+def run_migrations():
+    """Apply all pending migrations in a single transaction"""
+    applied_now = []
+    with get_db_cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [MIGRATION_LOCK_ID])
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {row["version"] for row in cursor.fetchall()}
+
+        for version, description, migration in MIGRATIONS:
+            if version in applied:
+                continue
+            print(f"Applying migration {version}: {description}")
+            if callable(migration):
+                migration(cursor)
+            else:
+                for statement in migration:
+                    cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                [version, description]
+            )
+            applied_now.append(version)
+    return applied_now
+
+if __name__ == "__main__":
+    applied = run_migrations()
+    print(f"Applied migrations: {applied}" if applied else "Database schema is up to date")
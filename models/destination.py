@@ -19,6 +19,8 @@ class Destination(BaseModel):
     description: str
     highlights: List[str]
     imageUrl: Optional[str] = None
+    # Set when the image is generated in the background; poll /images/jobs/{id}
+    imageJobId: Optional[str] = None
 
 class TravelPreferences(BaseModel):
     tripStyles: List[str]
@@ -41,3 +43,7 @@ class TravelRequest(BaseModel):
 
 class DestinationsResponse(BaseModel):
     destinations: List[Destination]
+    # True when the request deadline passed and some images were left out
+    partial: bool = False
+    # Provider that wrote the recommendations; after failover it is not the route's
+    provider: Optional[str] = None
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from dataclasses import dataclass
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 class TripCreate(BaseModel):
@@ -11,4 +12,20 @@ class TripCreate(BaseModel):
     endDate: date
     tripHighlights: Optional[str] = None
     linkPdf: Optional[str] = None
-    imgLink: Optional[str] = None
\ No newline at end of file
+    imgLink: Optional[str] = None
+
+class TripBatchRequest(BaseModel):
+    ids: List[UUID] = Field(min_length=1, max_length=200)
+
+@dataclass(slots=True)
+class TripRecord:
+    """Compact trip row for read paths; field order matches the trip SELECT lists"""
+    tripId: UUID
+    userId: UUID
+    destinationName: str
+    planDate: date
+    startDate: date
+    endDate: date
+    tripHighlights: Optional[str]
+    linkPdf: Optional[str]
+    imgLink: Optional[str]
@@ -1,5 +1,7 @@
 # Pydantic models for request/response validation
 from pydantic import BaseModel
+from dataclasses import dataclass
+from uuid import UUID
 
 class UserCreate(BaseModel):
     fullName: str
@@ -16,3 +18,12 @@ class UserUpdate(BaseModel):
     fullName: str | None = None
     address: str | None = None
     phoneNumber: str | None = None
+
+@dataclass(slots=True)
+class UserRecord:
+    """Compact user profile row; field order matches the profile SELECT lists"""
+    userId: UUID
+    fullName: str
+    email: str
+    address: str | None
+    phoneNumber: str | None
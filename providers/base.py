@@ -0,0 +1,109 @@
+import asyncio
+from abc import ABC, abstractmethod
+from functools import partial
+from models.destination import TravelRequest
+from providers.stats import ProviderStats
+from utils.concurrency import IMAGE_CONCURRENCY_GLOBAL
+from utils.data_uri import to_data_uri
+from utils.image_cache import image_cache, image_cache_key
+from utils.image_store import save_generated_image
+from utils.retry import image_retry_policy, text_retry_policy
+from utils.singleflight import SingleFlight
+
+# A specific place in this list gets several destinations within the state
+# instead of one, and images of them are captioned with "USA"
+US_STATES = frozenset([
+    'Alabama', 'Alaska', 'Arizona', 'Arkansas', 'California', 'Colorado', 'Connecticut',
+    'Delaware', 'Florida', 'Georgia', 'Hawaii', 'Idaho', 'Illinois', 'Indiana', 'Iowa',
+    'Kansas', 'Kentucky', 'Louisiana', 'Maine', 'Maryland', 'Massachusetts', 'Michigan',
+    'Minnesota', 'Mississippi', 'Missouri', 'Montana', 'Nebraska', 'Nevada', 'New Hampshire',
+    'New Jersey', 'New Mexico', 'New York', 'North Carolina', 'North Dakota', 'Ohio',
+    'Oklahoma', 'Oregon', 'Pennsylvania', 'Rhode Island', 'South Carolina', 'South Dakota',
+    'Tennessee', 'Texas', 'Utah', 'Vermont', 'Virginia', 'Washington', 'West Virginia',
+    'Wisconsin', 'Wyoming'
+])
+
+class RecommendationProvider(ABC):
+    """An LLM backend that can plan destinations and illustrate them.
+
+    Subclasses set name and label and implement create_travel_prompt(),
+    _complete() for one text completion and _render_image() for one image
+    attempt. Providers that can stream set supports_streaming and implement
+    complete_stream(prompt), an async iterator over the completion text.
+    This class adds retries, single-flight coalescing, the image cache and
+    store, the provider-wide image limit and rolling latency/error
+    statistics.
+    """
+
+    name = None
+    # Used in log lines and error messages, e.g. "Gemini API Error"
+    label = None
+    supports_streaming = False
+
+    def __init__(self):
+        self.stats = ProviderStats()
+        # Caps concurrent image generations across all requests in this worker
+        self.image_semaphore = asyncio.Semaphore(IMAGE_CONCURRENCY_GLOBAL)
+        # Identical in-flight model calls share a single upstream request
+        self.text_flight = SingleFlight(f"{self.name}.text")
+        self.image_flight = SingleFlight(f"{self.name}.image")
+
+    @abstractmethod
+    def create_travel_prompt(self, request: TravelRequest) -> str:
+        """Build the completion prompt for request"""
+
+    @abstractmethod
+    async def _complete(self, prompt: str) -> str:
+        """Run one text completion and return the raw model output"""
+
+    @abstractmethod
+    async def _render_image(self, city: str, location: str, is_us_state: bool) -> tuple[bytes, str]:
+        """Run one image generation and return (image bytes, mime type)"""
+
+    def is_timeout(self, error: Exception) -> bool:
+        return isinstance(error, asyncio.TimeoutError)
+
+    async def complete(self, prompt: str) -> str:
+        # Identical prompts in flight at the same time share one completion
+        return await self.text_flight.do(prompt, partial(
+            text_retry_policy.run,
+            partial(self._complete, prompt),
+            f"{self.label} completion"
+        ))
+
+    async def stored_image(self, city: str, location: str, is_us_state: bool) -> str | None:
+        """Content hash of the destination's image (see utils.image_cache.stored_image_url), a data URI or None"""
+        # The prompt depends only on these inputs, so a cached image skips the model entirely
+        cache_key = image_cache_key(self.name, city, location, is_us_state)
+        # Concurrent requests for the same destination share one generation
+        return await self.image_flight.do(
+            cache_key,
+            partial(self._generate_image, cache_key, city, location, is_us_state)
+        )
+
+    async def _generate_image(self, cache_key: str, city: str, location: str, is_us_state: bool) -> str | None:
+        """Return the stored image's content hash, a data URI if storing failed, or None"""
+        cached_hash = await asyncio.to_thread(image_cache.get_hash, cache_key)
+        if cached_hash is not None:
+            return cached_hash
+
+        try:
+            image_bytes, mime_type = await image_retry_policy.run(
+                partial(self._render_image, city, location, is_us_state),
+                f"{self.label} image for {city}"
+            )
+        except Exception as e:
+            print(f"Failed to generate image for {city}: {str(e)}")
+            return None
+
+        # Store once so callers get a short URL instead of megabytes of base64
+        try:
+            return await save_generated_image(cache_key, image_bytes, mime_type)
+        except Exception as e:
+            print(f"Failed to store image for {city}, inlining it instead: {str(e)}")
+            return to_data_uri(image_bytes, mime_type)
+
+    async def queued_image(self, city: str, location: str, is_us_state: bool) -> str | None:
+        # Background jobs count against the same limit as inline generation
+        async with self.image_semaphore:
+            return await self.stored_image(city, location, is_us_state)
@@ -0,0 +1,376 @@
+import asyncio
+import json
+import os
+import time
+from functools import partial
+from typing import Dict, Any
+from fastapi import HTTPException
+from pydantic import ValidationError
+from models.destination import TravelRequest, Destination
+from providers.base import RecommendationProvider
+from providers.gemini_provider import GeminiProvider
+from providers.openai_provider import OpenAIProvider
+from utils.concurrency import gather_bounded, run_bounded, IMAGE_CONCURRENCY_PER_REQUEST
+from utils.deadline import DeadlineExceeded, RECOMMENDATION_DEADLINE_SECONDS, remaining, request_deadline, with_deadline
+from utils.image_cache import image_cache_key, stored_image_url
+from utils.image_jobs import image_jobs
+from utils.json_response import json_dumps
+from utils.json_stream import JSONArrayStreamParser
+from utils.recommendation_cache import recommendation_cache, canonical_request_key
+
+# Fire the other provider when the requested one is slower than its own p95
+PROVIDER_HEDGING = os.getenv("PROVIDER_HEDGING", "false").lower() == "true"
+# Retry a failed completion on the other provider, and route around a degraded one
+PROVIDER_FAILOVER = os.getenv("PROVIDER_FAILOVER", "true").lower() == "true"
+
+class ProviderError(Exception):
+    """A failed completion, together with the provider that failed"""
+
+    def __init__(self, provider: RecommendationProvider, error: Exception):
+        super().__init__(str(error))
+        self.provider = provider
+        self.error = error
+
+def _parse_destinations(provider: RecommendationProvider, content: str) -> list:
+    # Clean up the content to ensure it's valid JSON
+    content = content.strip()
+    if content.startswith('```json'):
+        content = content[7:]
+    if content.endswith('```'):
+        content = content[:-3]
+    destinations = json.loads(content.strip())
+
+    # Validate response structure
+    if not destinations.get("destinations") or not isinstance(destinations["destinations"], list):
+        raise HTTPException(status_code=500, detail=f"Invalid response format from {provider.label}")
+
+    for dest in destinations["destinations"]:
+        if not all(key in dest for key in ["destination", "description", "highlights"]):
+            raise HTTPException(status_code=500, detail="Invalid destination format in response")
+    return destinations["destinations"]
+
+def _error_response(provider: RecommendationProvider, e: Exception) -> HTTPException:
+    print("Unexpected error:", str(e))
+    error_message = "Failed to generate travel recommendations"
+    status_code = 500
+
+    if "api_key" in str(e).lower():
+        error_message = "Invalid or missing API key"
+        status_code = 401
+    elif "rate_limit" in str(e).lower():
+        error_message = "Too many requests, please try again later"
+        status_code = 429
+    elif "billing" in str(e).lower():
+        error_message = f"{provider.label} billing error - please check your account"
+        status_code = 402
+
+    return HTTPException(status_code=status_code, detail=error_message)
+
+def _image_location(dest: Dict[str, Any]) -> tuple[str, str, bool]:
+    # Check if the destination has a state (US location) or country
+    is_us_location = "state" in dest["destination"]
+    location = dest["destination"].get("state") or dest["destination"].get("country")
+    return dest["destination"]["city"], location, is_us_location
+
+def _render(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Response for a generated or cached result, with image URLs for this request's origin"""
+    return {
+        "destinations": [
+            {**dest, "imageUrl": stored_image_url(image)}
+            for dest, image in zip(result["destinations"], result["images"])
+        ],
+        "partial": result["partial"],
+        "provider": result["provider"]
+    }
+
+def _sse_event(event: str, data) -> bytes:
+    return b"event: " + event.encode("ascii") + b"\ndata: " + json_dumps(data) + b"\n\n"
+
+async def _completion_chunks(provider: RecommendationProvider, prompt: str):
+    """Completion text as it arrives; providers that cannot stream send it in one chunk"""
+    if provider.supports_streaming:
+        async for text in provider.complete_stream(prompt):
+            yield text
+    else:
+        yield await provider.complete(prompt)
+
+class RecommendationEngine:
+    """The destination recommendation pipeline, shared by every provider route.
+
+    A request names its preferred provider. With failover, a degraded
+    provider is routed around and a failed completion is retried on the
+    other one; with hedging, the other provider is also started once the
+    preferred one has taken longer than its recent p95 latency, and the
+    first answer wins. Images come from whichever provider wrote the text,
+    and the response's provider field names it.
+    """
+
+    def __init__(self, providers: list[RecommendationProvider], hedging: bool, failover: bool):
+        self.providers = {provider.name: provider for provider in providers}
+        self.hedging = hedging
+        self.failover = failover
+        self._hedged = 0
+        self._failed_over = 0
+        self._rerouted = 0
+
+    def _route(self, name: str) -> tuple[RecommendationProvider, RecommendationProvider | None]:
+        primary = self.providers[name]
+        others = [provider for provider in self.providers.values() if provider is not primary]
+        secondary = others[0] if others and (self.hedging or self.failover) else None
+        if secondary is not None and self.failover and primary.stats.degraded and not secondary.stats.degraded:
+            print(f"{primary.label} is degraded, routing to {secondary.label}")
+            self._rerouted += 1
+            primary, secondary = secondary, primary
+        return primary, secondary
+
+    async def _attempt(self, provider: RecommendationProvider, request: TravelRequest):
+        """One provider's completion, parsed; malformed output counts as a failure"""
+        prompt = provider.create_travel_prompt(request)
+        print(f"Generated {provider.label} prompt:", prompt)
+        started = time.monotonic()
+        try:
+            destinations = _parse_destinations(provider, await provider.complete(prompt))
+        except asyncio.CancelledError:
+            # A losing hedge or an abandoned request still says how slow the provider was
+            provider.stats.record_abandoned(time.monotonic() - started)
+            raise
+        except Exception as e:
+            provider.stats.record_failure()
+            raise ProviderError(provider, e) from e
+        provider.stats.record_success(time.monotonic() - started)
+        return provider, destinations
+
+    async def _complete(self, request: TravelRequest, primary: RecommendationProvider, secondary: RecommendationProvider | None):
+        primary_task = asyncio.ensure_future(self._attempt(primary, request))
+        tasks = [primary_task]
+        attempts = {primary_task: primary}
+        try:
+            if secondary is not None and self.hedging:
+                hedge_after = primary.stats.percentile(0.95)
+                if hedge_after is not None:
+                    done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                    if not done:
+                        print(f"{primary.label} slower than its p95 ({hedge_after:.1f}s), hedging with {secondary.label}")
+                        self._hedged += 1
+                        hedge_task = asyncio.ensure_future(self._attempt(secondary, request))
+                        tasks.append(hedge_task)
+                        attempts[hedge_task] = secondary
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    print(f"{attempts[task].label} completion failed: {str(task.exception())}")
+
+            if secondary is not None and self.failover and len(tasks) == 1:
+                print(f"{primary.label} failed, failing over to {secondary.label}")
+                self._failed_over += 1
+                try:
+                    return await self._attempt(secondary, request)
+                except Exception as e:
+                    print(f"{secondary.label} failed too: {str(e)}")
+            raise primary_task.exception()
+        finally:
+            # The losing hedge is no longer needed
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _with_image_job(self, provider: RecommendationProvider, dest: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a background image job for dest instead of generating it inline"""
+        city, location, is_us_location = _image_location(dest)
+        job = image_jobs.submit(
+            image_cache_key(provider.name, city, location, is_us_location),
+            partial(provider.queued_image, city, location, is_us_location)
+        )
+        if job is None:
+            print(f"Image job queue full, skipping image for {city}")
+            return {**dest, "imageUrl": None, "imageJobId": None}
+        image = stored_image_url(job.result) if job.status == "done" else None
+        return {**dest, "imageUrl": image, "imageJobId": job.id}
+
+    async def generate(self, request: TravelRequest, provider_name: str, defer_images: bool = False) -> Dict[str, Any]:
+        """Destinations with images for request, preferring provider_name"""
+        # Past the deadline the frontend has given up, so stop upstream work
+        with request_deadline(RECOMMENDATION_DEADLINE_SECONDS):
+            return await self._generate(request, provider_name, defer_images)
+
+    async def _generate(self, request: TravelRequest, provider_name: str, defer_images: bool) -> Dict[str, Any]:
+        # Near-identical travel requests share one cached response per route
+        response_cache = recommendation_cache.namespace(provider_name)
+        cache_key = canonical_request_key(request)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return _render(cached)
+
+        primary, secondary = self._route(provider_name)
+        provider = primary
+        try:
+            print("Received request:", request.dict())
+            try:
+                provider, destinations = await with_deadline(self._complete(request, primary, secondary))
+            except DeadlineExceeded:
+                print(f"Completion did not finish within {RECOMMENDATION_DEADLINE_SECONDS}s")
+                raise HTTPException(
+                    status_code=504,
+                    detail="Timed out generating recommendations"
+                )
+            except ProviderError as failure:
+                failed, api_error = failure.provider, failure.error
+                if isinstance(api_error, HTTPException):
+                    raise api_error
+                if failed.is_timeout(api_error):
+                    print(f"{failed.label} API timed out")
+                    raise HTTPException(
+                        status_code=504,
+                        detail=f"{failed.label} API timed out"
+                    )
+                print(f"{failed.label} API Error:", str(api_error))
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"{failed.label} API Error: {str(api_error)}"
+                )
+            if provider.name != provider_name:
+                print(f"{provider.label} is serving a {provider_name} request")
+
+            if defer_images:
+                # Return the text now; clients poll /images/jobs/{id} for the images
+                return {
+                    "destinations": [self._with_image_job(provider, dest) for dest in destinations],
+                    "provider": provider.name
+                }
+
+            # Generate images for all destinations concurrently
+            image_tasks = [
+                partial(provider.stored_image, *_image_location(dest))
+                for dest in destinations
+            ]
+            # Images still running at the deadline are cancelled and left out
+            stored_images = await gather_bounded(image_tasks, IMAGE_CONCURRENCY_PER_REQUEST, provider.image_semaphore, timeout=remaining())
+
+            # Images whose retries were cut short by the deadline come back as None
+            out_of_time = remaining() == 0
+            images = []
+            is_partial = False
+            for dest, image in zip(destinations, stored_images):
+                if isinstance(image, DeadlineExceeded) or (image is None and out_of_time):
+                    is_partial = True
+                    image = None
+                elif isinstance(image, Exception):
+                    print(f"Failed to generate {provider.label} image for {dest['destination']['city']}: {str(image)}")
+                    image = None
+                images.append(image)
+
+            # Cache content hashes rather than URLs, whose origin depends on the request
+            result = {"destinations": destinations, "images": images, "partial": is_partial, "provider": provider.name}
+            # Only cache complete responses so a later request can retry missing images
+            if all(images):
+                response_cache.set(cache_key, result)
+            return _render(result)
+
+        except HTTPException as he:
+            raise he
+        except Exception as e:
+            raise _error_response(provider, e)
+
+    async def stream(self, request: TravelRequest, provider_name: str):
+        """Yield SSE events: each destination as soon as the model finishes it,
+        then an image event per destination as its image becomes ready.
+
+        A stream cannot switch providers halfway, so it always uses provider_name.
+        """
+        provider = self.providers[provider_name]
+        response_cache = recommendation_cache.namespace(provider_name)
+        cache_key = canonical_request_key(request)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            # Replay the same events a live stream sends
+            for index, dest in enumerate(cached["destinations"]):
+                yield _sse_event("destination", {"index": index, **dest})
+            for index, image in enumerate(cached["images"]):
+                yield _sse_event("image", {"index": index, "imageUrl": stored_image_url(image)})
+            yield _sse_event("done", {"count": len(cached["destinations"])})
+            return
+
+        prompt = provider.create_travel_prompt(request)
+        parser = JSONArrayStreamParser("destinations")
+        destinations = []
+        images = []
+        pending = set()
+        local_semaphore = asyncio.Semaphore(IMAGE_CONCURRENCY_PER_REQUEST)
+
+        async def generate_image(index: int, dest: Dict[str, Any]):
+            try:
+                image = await run_bounded(
+                    partial(provider.stored_image, *_image_location(dest)),
+                    local_semaphore,
+                    provider.image_semaphore
+                )
+            except Exception as e:
+                print(f"Failed to generate image for {dest['destination']['city']}: {str(e)}")
+                image = None
+            return index, image
+
+        def image_events(done):
+            for task in done:
+                pending.discard(task)
+                index, image = task.result()
+                images[index] = image
+                yield _sse_event("image", {"index": index, "imageUrl": stored_image_url(image)})
+
+        try:
+            try:
+                async for text in _completion_chunks(provider, prompt):
+                    for dest in parser.feed(text):
+                        try:
+                            Destination.model_validate(dest)
+                        except ValidationError as e:
+                            print(f"Skipping invalid destination in stream: {str(e)}")
+                            continue
+                        index = len(destinations)
+                        destinations.append(dest)
+                        images.append(None)
+                        yield _sse_event("destination", {"index": index, **dest})
+                        # Start the image now; later destinations keep streaming meanwhile
+                        pending.add(asyncio.create_task(generate_image(index, dest)))
+                    for event in image_events([task for task in pending if task.done()]):
+                        yield event
+            except Exception as api_error:
+                print(f"{provider.label} API Error:", str(api_error))
+                yield _sse_event("error", {"detail": f"{provider.label} API Error: {str(api_error)}"})
+                return
+
+            if not destinations:
+                yield _sse_event("error", {"detail": f"Invalid response format from {provider.label}"})
+                return
+
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for event in image_events(done):
+                    yield event
+
+            if all(images):
+                response_cache.set(cache_key, {"destinations": destinations, "images": images, "partial": False, "provider": provider.name})
+            yield _sse_event("done", {"count": len(destinations)})
+        finally:
+            # The client disconnected or the stream failed; stop generating unseen images
+            for task in pending:
+                task.cancel()
+
+    def stats(self):
+        return {
+            "hedging": self.hedging,
+            "failover": self.failover,
+            "hedged": self._hedged,
+            "failed_over": self._failed_over,
+            "rerouted": self._rerouted,
+            "providers": {name: provider.stats.stats() for name, provider in self.providers.items()},
+        }
+
+recommendation_engine = RecommendationEngine(
+    [GeminiProvider(), OpenAIProvider()],
+    hedging=PROVIDER_HEDGING,
+    failover=PROVIDER_FAILOVER
+)
@@ -0,0 +1,200 @@
+from google import genai
+from google.genai import types
+import os
+from models.destination import TravelRequest
+from dotenv import load_dotenv
+from functools import partial
+import base64
+from providers.base import US_STATES, RecommendationProvider
+from utils.retry import RetryableError, text_retry_policy
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Initialize Gemini client with API key
+api_key = os.getenv("GEMINI_API_KEY")
+if not api_key:
+    raise ValueError("GEMINI_API_KEY environment variable is not set")
+
+client = genai.Client(api_key=api_key)
+
+def create_travel_prompt(request: TravelRequest) -> str:
+    basic_info = request.basicInfo
+    
+    is_us_state = basic_info.specificPlace in US_STATES
+    # Determine the initial prompt based on whether it's a specific place
+    if basic_info.isSpecificPlace:
+        if is_us_state:
+            location_prompt = f"suggest 5-6 top travel destinations in {basic_info.specificPlace}"
+        else:
+            location_prompt = f"provide detailed travel information for {basic_info.specificPlace}"
+    else:
+        location_suffix = f" located in {basic_info.destination}" if basic_info.destination else ""
+        location_prompt = f"suggest 5 to 6 travel destinations{location_suffix}"
+    
+    # Build basic information section
+    destination_type = 'Specific Place' if basic_info.isSpecificPlace else 'Country'
+    location = basic_info.specificPlace if basic_info.isSpecificPlace else (basic_info.destination or 'Open to suggestions')
+    basic_info_section = f"""Basic Information:
+- Destination Type: {destination_type}
+- Location: {location}
+- Travel Dates: {basic_info.startDate} to {basic_info.endDate}
+- Number of Travelers: {basic_info.travelers}"""
+
+    # Build preferences section
+    preferences_section = f"""Travel Preferences:
+- Trip Styles: {', '.join(request.travelPreferences.tripStyles)}
+- Accommodation Types: {', '.join(request.travelPreferences.accommodation)}
+- Transportation: {', '.join(request.travelPreferences.transportation)}"""
+
+    # Build dining and activities sections
+    dining_section = f"Dining Preferences:\n{', '.join(request.diningPreferences)}"
+    activities_section = f"Activities:\n{', '.join(request.activities)}"
+
+    # Build destination count text
+    if basic_info.isSpecificPlace:
+        dest_count = "5-6 destinations" if is_us_state else "exactly 1 destination"
+    else:
+        dest_count = "5-6 destinations"
+    highlights_count = "7-10 specific highlights" if basic_info.isSpecificPlace else "5-7 highlights"
+
+    destination = '{"city": string, "state": string}' if is_us_state else '{"city": string, "country": string}'
+    
+    # Combine all sections
+    prompt = f"""As an AI travel planner, {location_prompt}:
+
+{basic_info_section}
+
+{preferences_section}
+
+{dining_section}
+
+{activities_section}
+
+For each destination, provide:
+1. Location details (format depends on destination type)
+2. A brief description (2-3 sentences) that includes:
+   - The location's geographic position
+   - Why it matches their preferences
+3. 5-7 specific trip highlights or recommended activities
+
+Format the response as a JSON object with the following structure:
+{{
+  "destinations": [  // Will contain {dest_count}
+    {{
+      "destination": {destination},  // Format depends on location type
+      "description": string,  // Brief overview of the destination
+      "highlights": string[]  // Array of {highlights_count}
+    }}
+  ]
+}}
+
+IMPORTANT: Ensure the response is a valid JSON object with all required fields."""
+
+    return prompt
+
+async def _request_destination_image(prompt: str) -> tuple[bytes, str]:
+    """One image generation attempt; a response without a usable image is retryable"""
+    # Configure image generation with specific parameters
+    response = await client.aio.models.generate_content(
+        model="gemini-2.0-flash-exp-image-generation",
+        contents=prompt,
+        config=types.GenerateContentConfig(
+            response_modalities=['TEXT', 'IMAGE'],
+            temperature=0.7,  # Lower temperature for more realistic results
+            top_p=0.9,
+            top_k=40
+        )
+    )
+
+    if not response or not response.candidates or not response.candidates[0].content:
+        raise RetryableError("No content in response")
+
+    content = response.candidates[0].content
+    if not content.parts:
+        raise RetryableError("No parts in content")
+
+    # Process image data
+    for part in content.parts:
+        if part.inline_data and part.inline_data.mime_type.startswith('image/'):
+            mime_type = part.inline_data.mime_type
+            image_data = part.inline_data.data
+
+            # Handle different image data formats
+            if isinstance(image_data, bytes):
+                # Raw bytes can be stored as-is, no base64 round trip needed
+                return image_data, mime_type
+
+            # Try to parse the string as base64
+            try:
+                # First, try to decode it as base64 to validate it
+                base64.b64decode(image_data)
+            except:
+                # If it's not valid base64, it might be a string representation of bytes
+                # Remove any b' prefix and ' suffix if present
+                if image_data.startswith("b'") and image_data.endswith("'"):
+                    image_data = image_data[2:-1]
+                # Remove any double encoding
+                if image_data.startswith("'b'") and image_data.endswith("''"):
+                    image_data = image_data[3:-2]
+
+            # Verify the base64 data is valid
+            try:
+                return base64.b64decode(image_data), mime_type
+            except Exception as e:
+                raise RetryableError(f"Invalid base64 data: {str(e)}")
+
+    raise RetryableError("No image found in response parts")
+
+class GeminiProvider(RecommendationProvider):
+    name = "gemini"
+    label = "Gemini"
+    supports_streaming = True
+
+    def create_travel_prompt(self, request: TravelRequest) -> str:
+        return create_travel_prompt(request)
+
+    async def _complete(self, prompt: str) -> str:
+        response = await client.aio.models.generate_content(
+            model="gemini-2.0-flash",
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                temperature=0.9,
+                top_p=0.8,
+                top_k=40
+            )
+        )
+
+        if not response or not response.candidates or not response.candidates[0].content:
+            raise RetryableError("No content in response")
+
+        content = response.candidates[0].content.parts[0].text
+        if not content:
+            raise RetryableError("Empty content in response")
+        return content
+
+    async def complete_stream(self, prompt: str):
+        """Async iterator over the completion text as the model produces it"""
+        # Only opening the stream is retried; chunks already sent cannot be taken back
+        stream = await text_retry_policy.run(partial(
+            client.aio.models.generate_content_stream,
+            model="gemini-2.0-flash",
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                temperature=0.9,
+                top_p=0.8,
+                top_k=40
+            )
+        ), "Gemini completion stream")
+        async for chunk in stream:
+            yield chunk.text or ""
+
+    async def _render_image(self, city: str, location: str, is_us_state: bool) -> tuple[bytes, str]:
+        # Enhanced prompt engineering for better image quality
+        location_text = f"{city}, {location}, USA" if is_us_state else f"{city}, {location}"
+        prompt = f"""Generate a stunning, professional travel photograph of {location_text}.
+                      Focus: Iconic landmarks, beautiful cityscapes, or natural wonders.
+                      Style: High-quality travel photography, photorealistic, cinematic.
+                      Composition: Wide angle, dramatic lighting, perfect exposure.
+                      Resolution: 1024x1024, sharp details, vibrant colors."""
+        return await _request_destination_image(prompt)
@@ -0,0 +1,144 @@
+from openai import AsyncOpenAI, APITimeoutError
+import httpx
+import os
+from models.destination import TravelRequest
+from dotenv import load_dotenv
+import asyncio
+import base64
+from providers.base import US_STATES, RecommendationProvider
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Initialize OpenAI client with API key
+api_key = os.getenv("OPENAI_API_KEY")
+if not api_key:
+    raise ValueError("OPENAI_API_KEY environment variable is not set")
+
+# Timeouts in seconds; image generation is slower than chat completions
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+OPENAI_IMAGE_TIMEOUT_SECONDS = float(os.getenv("OPENAI_IMAGE_TIMEOUT_SECONDS", "90"))
+
+myOpenAI = AsyncOpenAI(
+    api_key=api_key,
+    timeout=httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=10.0),
+    # Retries go through utils.retry so they share backoff and time budgets
+    max_retries=0
+)
+
+def create_travel_prompt(request: TravelRequest) -> str:
+    basic_info = request.basicInfo
+    
+    is_us_state = basic_info.specificPlace in US_STATES
+    # Determine the initial prompt based on whether it's a specific place
+    if basic_info.isSpecificPlace:
+        if is_us_state:
+            location_prompt = f"suggest 2-3 top travel destinations in {basic_info.specificPlace}"
+        else:
+            location_prompt = f"provide detailed travel information for {basic_info.specificPlace}"
+    else:
+        location_suffix = f" located in {basic_info.destination}" if basic_info.destination else ""
+        location_prompt = f"suggest 2 to 3 travel destinations{location_suffix}"
+    
+    # Build basic information section
+    destination_type = 'Specific Place' if basic_info.isSpecificPlace else 'Country'
+    location = basic_info.specificPlace if basic_info.isSpecificPlace else (basic_info.destination or 'Open to suggestions')
+    basic_info_section = f"""Basic Information:
+- Destination Type: {destination_type}
+- Location: {location}
+- Travel Dates: {basic_info.startDate} to {basic_info.endDate}
+- Number of Travelers: {basic_info.travelers}"""
+
+    # Build preferences section
+    preferences_section = f"""Travel Preferences:
+- Trip Styles: {', '.join(request.travelPreferences.tripStyles)}
+- Accommodation Types: {', '.join(request.travelPreferences.accommodation)}
+- Transportation: {', '.join(request.travelPreferences.transportation)}"""
+
+    # Build dining and activities sections
+    dining_section = f"Dining Preferences:\n{', '.join(request.diningPreferences)}"
+    activities_section = f"Activities:\n{', '.join(request.activities)}"
+
+    # Build destination count text
+    if basic_info.isSpecificPlace:
+        dest_count = "2-3 destinations" if is_us_state else "exactly 1 destination"
+    else:
+        dest_count = "2-3 destinations"
+    highlights_count = "7-10 specific highlights" if basic_info.isSpecificPlace else "5-7 highlights"
+
+    destination = '{"city": string, "state": string}' if is_us_state else '{"city": string, "country": string}'
+    
+    # Combine all sections
+    prompt = f"""As an AI travel planner, {location_prompt}:
+
+{basic_info_section}
+
+{preferences_section}
+
+{dining_section}
+
+{activities_section}
+
+For each destination, provide:
+1. Location details (format depends on destination type)
+2. A brief description (2-3 sentences) that includes:
+   - The location's geographic position
+   - Why it matches their preferences
+3. 5-7 specific trip highlights or recommended activities
+
+Format the response as a JSON object with the following structure:
+{{
+  "destinations": [  // Will contain {dest_count}]
+    {{
+      "destination": {destination},  // Format depends on location type
+      "description": string,  // Include detailed location information
+      "highlights": string[]  // {highlights_count}
+    }}
+  ]
+}}
+
+Ensure the suggestions are highly personalized based on all preferences and provide specific, actionable recommendations."""
+    return prompt
+
+class OpenAIProvider(RecommendationProvider):
+    name = "openai"
+    label = "OpenAI"
+
+    def create_travel_prompt(self, request: TravelRequest) -> str:
+        return create_travel_prompt(request)
+
+    async def _complete(self, prompt: str) -> str:
+        completion = await myOpenAI.chat.completions.create(
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a travel planning assistant that provides personalized destination recommendations based on user preferences. Always respond in the exact JSON format specified in the prompt. Focus on providing specific, actionable recommendations that match the user's preferences.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            model="gpt-4-turbo-preview",
+            response_format={"type": "json_object"},
+            temperature=0.7,
+            max_tokens=1500,
+        )
+        content = completion.choices[0].message.content
+        if not content:
+            raise ValueError("No content in response")
+        return content
+
+    def is_timeout(self, error: Exception) -> bool:
+        return isinstance(error, (APITimeoutError, asyncio.TimeoutError))
+
+    async def _render_image(self, city: str, location: str, is_us_state: bool) -> tuple[bytes, str]:
+        prompt = f"A beautiful, professional travel photograph of {city}, {location}. Show iconic landmarks or cityscapes that capture the essence of the destination. Style: high-quality travel photography, 4K, realistic."
+        response = await myOpenAI.images.generate(
+            model="dall-e-3",
+            prompt=prompt,
+            size="1024x1024",
+            quality="standard",
+            n=1,
+            # DALL-E URLs expire after an hour, so fetch the bytes to cache them
+            response_format="b64_json",
+            timeout=OPENAI_IMAGE_TIMEOUT_SECONDS
+        )
+        return base64.b64decode(response.data[0].b64_json), "image/png"
@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Outcomes older than this no longer count, so a degraded provider gets
+# traffic again once its failures age out
+PROVIDER_STATS_WINDOW_SECONDS = float(os.getenv("PROVIDER_STATS_WINDOW_SECONDS", "300"))
+PROVIDER_STATS_MAX_SAMPLES = int(os.getenv("PROVIDER_STATS_MAX_SAMPLES", "500"))
+# Fewer samples than this are not enough to judge latency or health
+PROVIDER_STATS_MIN_SAMPLES = int(os.getenv("PROVIDER_STATS_MIN_SAMPLES", "10"))
+PROVIDER_DEGRADED_ERROR_RATE = float(os.getenv("PROVIDER_DEGRADED_ERROR_RATE", "0.5"))
+
+class ProviderStats:
+    """Rolling latency and error statistics for one upstream provider.
+
+    Only calls that finished within the last window_seconds are considered,
+    capped at max_samples. Latency percentiles use successful and abandoned
+    calls.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = PROVIDER_STATS_WINDOW_SECONDS,
+        max_samples: int = PROVIDER_STATS_MAX_SAMPLES,
+        min_samples: int = PROVIDER_STATS_MIN_SAMPLES,
+        degraded_error_rate: float = PROVIDER_DEGRADED_ERROR_RATE
+    ):
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.degraded_error_rate = degraded_error_rate
+        # (finished_at, latency or None for a failure)
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._samples.append((time.monotonic(), latency))
+
+    def record_abandoned(self, elapsed: float):
+        """A call cancelled after elapsed seconds, e.g. a hedge that lost.
+
+        It would have taken at least that long, so leaving it out would pull
+        the percentiles down every time a hedge wins.
+        """
+        self.record_success(elapsed)
+
+    def record_failure(self):
+        with self._lock:
+            self._samples.append((time.monotonic(), None))
+
+    def _recent(self) -> list:
+        cutoff = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return list(self._samples)
+
+    def percentile(self, q: float) -> float | None:
+        """Latency at quantile q (0-1) of recent successes, or None without enough data"""
+        with self._lock:
+            latencies = sorted(latency for _, latency in self._recent() if latency is not None)
+        if len(latencies) < self.min_samples:
+            return None
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+    def error_rate(self) -> float | None:
+        with self._lock:
+            samples = self._recent()
+        if len(samples) < self.min_samples:
+            return None
+        return sum(1 for _, latency in samples if latency is None) / len(samples)
+
+    @property
+    def degraded(self) -> bool:
+        error_rate = self.error_rate()
+        return error_rate is not None and error_rate >= self.degraded_error_rate
+
+    def stats(self):
+        with self._lock:
+            samples = self._recent()
+        failures = sum(1 for _, latency in samples if latency is None)
+        return {
+            "samples": len(samples),
+            "failures": failures,
+            "error_rate": failures / len(samples) if samples else 0.0,
+            "p50_seconds": self.percentile(0.5),
+            "p95_seconds": self.percentile(0.95),
+            "degraded": self.degraded,
+        }
@@ -0,0 +1,127 @@
+from fastapi import APIRouter, HTTPException, Path, Query, Request
+from fastapi.responses import FileResponse, Response
+from database import get_async_db_cursor
+from psycopg2.extensions import cursor as TupleCursor
+from utils.image_cache import image_cache, stored_image_url
+from utils.image_jobs import image_jobs
+import asyncio
+import os
+
+router = APIRouter(
+    prefix="/images",
+    tags=["images"]
+)
+
+# Images are content-addressed, so a given URL never changes
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Upper bound on how long a job status request may long-poll
+IMAGE_JOB_MAX_WAIT_SECONDS = 30
+
+class _UnsatisfiableRange(Exception):
+    pass
+
+def _parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single 'bytes=' range into inclusive (start, end).
+
+    Returns None for headers we do not handle (other units, multiple ranges),
+    in which case the full image is sent.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text == "":
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise _UnsatisfiableRange()
+            return max(size - length, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise _UnsatisfiableRange()
+    return start, min(end, size - 1)
+
+def _read_range(path: str, start: int, end: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start + 1)
+
+async def _load_stored_image(content_hash: str) -> tuple[bytes, str] | None:
+    """Images saved with a trip live in Postgres; used when the local blob is gone"""
+    async with get_async_db_cursor(cursor_factory=TupleCursor) as cursor:
+        await cursor.execute("SELECT data, mimeType FROM images WHERE contentHash = %s", [content_hash])
+        row = await cursor.fetchone()
+    if row is None:
+        return None
+    return bytes(row[0]), row[1]
+
+@router.get("/jobs/{job_id}")
+async def get_image_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=IMAGE_JOB_MAX_WAIT_SECONDS, description="Seconds to wait for the job to finish")
+):
+    """Status of a background image job; with wait > 0 this long-polls until it finishes"""
+    job = await image_jobs.wait(job_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Image job not found or expired")
+    return {
+        "jobId": job.id,
+        "status": job.status,
+        "imageUrl": stored_image_url(job.result) if job.status == "done" else None
+    }
+
+@router.get("/{content_hash}")
+async def get_image(request: Request, content_hash: str = Path(pattern=r"^[0-9a-f]{64}$")):
+    # Prefer the local blob; fall back to the images table
+    path = None
+    data = None
+    info = image_cache.blob_info(content_hash)
+    if info is not None and os.path.exists(info[0]):
+        path, mime_type, size = info
+    else:
+        stored = await _load_stored_image(content_hash)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Image not found")
+        data, mime_type = stored
+        size = len(data)
+
+    etag = f'"{content_hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMAGE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes"
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags or f"W/{etag}" in tags:
+            return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except _UnsatisfiableRange:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            if data is not None:
+                chunk = data[start:end + 1]
+            else:
+                try:
+                    chunk = await asyncio.to_thread(_read_range, path, start, end)
+                except FileNotFoundError:
+                    raise HTTPException(status_code=404, detail="Image not found")
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            return Response(content=chunk, status_code=206, media_type=mime_type, headers=headers)
+
+    if data is not None:
+        return Response(content=data, media_type=mime_type, headers=headers)
+    return FileResponse(path, media_type=mime_type, headers=headers)
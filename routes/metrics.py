@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from database import get_pool_stats
+from auth.password import password_hasher_stats
+from auth.jwt_handler import verified_token_cache
+from auth.rate_limiter import login_rate_limit_stats
+from utils.image_cache import image_cache
+from utils.image_jobs import image_jobs
+from utils.recommendation_cache import recommendation_cache
+from utils.singleflight import singleflight_stats
+from providers.engine import recommendation_engine
+from routes.trip import trip_cache
+from routes.user import user_cache
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"]
+)
+
+@router.get("/")
+async def get_metrics():
+    """Expose in-process performance counters"""
+    return {
+        "dbPool": get_pool_stats(),
+        "tripCache": trip_cache.stats(),
+        "userCache": user_cache.stats(),
+        "passwordHasher": password_hasher_stats(),
+        "tokenCache": verified_token_cache.stats(),
+        "loginRateLimit": login_rate_limit_stats(),
+        "imageCache": image_cache.stats(),
+        "imageJobs": image_jobs.stats(),
+        "recommendationCache": recommendation_cache.stats(),
+        "singleFlight": singleflight_stats(),
+        "recommendationProviders": recommendation_engine.stats()
+    }
@@ -8,6 +8,9 @@ from datetime import datetime
 from models.trip import TripCreate as Trip
 from dotenv import load_dotenv
 import random
+from functools import partial
+from utils.singleflight import SingleFlight
+from utils.retry import text_retry_policy
 
 # Load environment variables from .env file
 load_dotenv()
@@ -24,6 +27,9 @@ if not api_key:
 
 client = genai.Client(api_key=api_key)
 
+# Identical prompts in flight at the same time share one completion
+text_flight = SingleFlight("recommendations.text")
+
 def create_recommendation_prompt(past_trips: List[Trip]) -> str:
     # Get today's date
     today = datetime.now().strftime('%Y-%m-%d')
@@ -161,15 +167,20 @@ async def suggest_trip(user_id: str, past_trips: List[Trip]) -> Dict[str, Any]:
             raise HTTPException(status_code=500, detail="Failed to generate prompt")
         print("--- Gemini prompt ---\n", prompt)
 
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.9,
-                top_p=0.8,
-                top_k=40
-            )
-        )
+        response = await text_flight.do(prompt, partial(
+            text_retry_policy.run,
+            partial(
+                client.aio.models.generate_content,
+                model="gemini-2.0-flash",
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    temperature=0.9,
+                    top_p=0.8,
+                    top_k=40
+                )
+            ),
+            "Gemini recommendation"
+        ))
 
         if not response or not response.candidates or not response.candidates[0].content:
             print("Failed to generate prompt. No content in response.")
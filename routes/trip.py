@@ -1,64 +1,400 @@
-from fastapi import APIRouter, HTTPException
-from database import get_db_cursor
-from models.trip import TripCreate
-from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from database import get_async_db_cursor, get_db_cursor
+from psycopg2.extensions import cursor as TupleCursor
+from psycopg2.errors import ForeignKeyViolation
+from pydantic import ValidationError
+from models.trip import TripCreate, TripRecord, TripBatchRequest
+from auth.jwt_handler import get_current_user
+from utils.cache import TTLCache
+from utils.json_response import FastJSONResponse
+from utils.data_uri import parse_data_uri
+from utils.image_cache import IMAGE_PATH_PREFIX, absolute_image_url, image_cache, image_url, parse_image_url
+from uuid import UUID, uuid4
+from dataclasses import replace
+from datetime import date
+from typing import Optional
+import asyncio
+import base64
+import hashlib
+import json
+import os
 
 router = APIRouter(
     prefix="/trips",
-    tags=["trips"]
+    tags=["trips"],
+    dependencies=[Depends(get_current_user)]
 )
 
+TRIPS_PAGE_SIZE_DEFAULT = int(os.getenv("TRIPS_PAGE_SIZE_DEFAULT", "50"))
+TRIPS_PAGE_SIZE_MAX = int(os.getenv("TRIPS_PAGE_SIZE_MAX", "200"))
+TRIP_EXPORT_BATCH_SIZE = int(os.getenv("TRIP_EXPORT_BATCH_SIZE", "2000"))
+TRIP_BULK_MAX_ROWS = int(os.getenv("TRIP_BULK_MAX_ROWS", "50000"))
+TRIP_BULK_MAX_BYTES = int(os.getenv("TRIP_BULK_MAX_BYTES", str(64 * 1024 * 1024)))
+TRIP_BULK_PAGE_SIZE = int(os.getenv("TRIP_BULK_PAGE_SIZE", "1000"))
+
+# Read-through cache for single-trip lookups, keyed by trip id string.
+# Writes through this router invalidate it; the TTL bounds staleness across workers.
+trip_cache = TTLCache(
+    maxsize=int(os.getenv("TRIP_CACHE_MAXSIZE", "10000")),
+    ttl=float(os.getenv("TRIP_CACHE_TTL", "300"))
+)
+
+def _read_local_image(content_hash: str) -> tuple[bytes, str] | None:
+    info = image_cache.blob_info(content_hash)
+    if info is None:
+        return None
+    path, mime_type, _ = info
+    try:
+        with open(path, "rb") as f:
+            return f.read(), mime_type
+    except FileNotFoundError:
+        return None
+
+def _with_image_url(trip: TripRecord) -> TripRecord:
+    """Trips are cached with host-relative image paths; resolve them for this request"""
+    link = absolute_image_url(trip.imgLink)
+    return trip if link is trip.imgLink else replace(trip, imgLink=link)
+
+async def _prepare_trip_image(img_link: Optional[str]):
+    """Split an incoming imgLink into what the trips and images tables store.
+
+    Returns (image_hash, image, img_link): inline data URIs and our own
+    /images/{hash} URLs become a reference into the images table, with the
+    bytes to insert when we have them. Without the bytes the link is kept as
+    well, for an image that never made it into the images table.
+    """
+    parsed = parse_data_uri(img_link)
+    if parsed is not None:
+        data, mime_type = parsed
+        return hashlib.sha256(data).hexdigest(), (data, mime_type), None
+
+    content_hash = parse_image_url(img_link)
+    if content_hash is not None:
+        local_image = await asyncio.to_thread(_read_local_image, content_hash)
+        if local_image is not None:
+            return content_hash, local_image, None
+        # Generated images are saved to the images table, so the local copy
+        # being gone (evicted, or another worker's disk) is not a dead link
+        return content_hash, None, img_link
+
+    return None, None, img_link
+
 @router.post("/")
 async def create_trip(trip: TripCreate):
-    with get_db_cursor() as cursor:
-        # Verify user exists
-        cursor.execute("SELECT userid FROM users WHERE userid = %s", [str(trip.userId)])
-        if not cursor.fetchone():
+    image_hash, image, img_link = await _prepare_trip_image(trip.imgLink)
+
+    # Store the image (deduplicated by content hash) in the same statement as the trip
+    image_cte = ""
+    image_params = []
+    # Reference an image we have no bytes for only if the images table has it
+    image_hash_sql = "%s"
+    if image is None and image_hash is not None:
+        image_hash_sql = "(SELECT contentHash FROM images WHERE contentHash = %s)"
+    if image is not None:
+        image_cte = """
+            WITH new_image AS (
+                INSERT INTO images (contentHash, mimeType, data)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (contentHash) DO NOTHING
+            )"""
+        image_params = [image_hash, image[1], image[0]]
+
+    async with get_async_db_cursor() as cursor:
+        # Insert only if the user exists; no row back means the user was not found
+        try:
+            await cursor.execute(image_cte + f"""
+                INSERT INTO trips (userId, destinationName, planDate, startDate, endDate, tripHighlights, linkPdf, imgLink, imageHash)
+                SELECT userid, %s, %s, %s, %s, %s, %s, %s, {image_hash_sql}
+                FROM users
+                WHERE userid = %s
+                RETURNING 
+                    tripid as "tripId",
+                    userid as "userId",
+                    destinationname as "destinationName",
+                    plandate as "planDate",
+                    startdate as "startDate",
+                    enddate as "endDate",
+                    triphighlights as "tripHighlights",
+                    linkpdf as "linkPdf",
+                    COALESCE(%s || imagehash, imglink) as "imgLink"
+            """, image_params + [
+                trip.destinationName,
+                trip.planDate,
+                trip.startDate,
+                trip.endDate,
+                trip.tripHighlights,
+                trip.linkPdf,
+                img_link,
+                image_hash,
+                str(trip.userId),
+                IMAGE_PATH_PREFIX
+            ])
+        except ForeignKeyViolation:
+            # User was deleted concurrently after the row was selected
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Create trip
-        cursor.execute("""
-            INSERT INTO trips (userId, destinationName, planDate, startDate, endDate, tripHighlights, linkPdf, imgLink)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING 
-                tripid as "tripId",
-                userid as "userId",
-                destinationname as "destinationName",
-                plandate as "planDate",
-                startdate as "startDate",
-                enddate as "endDate",
-                triphighlights as "tripHighlights",
-                linkpdf as "linkPdf",
-                imglink as "imgLink"
-        """, [
-            str(trip.userId),
-            trip.destinationName,
-            trip.planDate,
-            trip.startDate,
-            trip.endDate,
-            trip.tripHighlights,
-            trip.linkPdf,
-            trip.imgLink
-        ])
-        
-        new_trip = cursor.fetchone()
+        new_trip = await cursor.fetchone()
+        if new_trip is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        trip_cache.invalidate(str(new_trip["tripId"]))
+        new_trip["imgLink"] = absolute_image_url(new_trip["imgLink"])
         return new_trip
 
-@router.get("/user/{user_id}")
-async def get_user_trips(user_id: UUID):
-    with get_db_cursor() as cursor:
-        # First check if user exists
-        cursor.execute("""
-            SELECT EXISTS(
-                SELECT 1 FROM users WHERE userid = %s
-            ) as "exists"
-        """, [str(user_id)])
-        result = cursor.fetchone()
-        user_exists = result["exists"] if result else False
+def _encode_cursor(plan_date: date, trip_id: UUID) -> str:
+    """Encode a keyset position as an opaque, URL-safe cursor"""
+    raw = json.dumps([plan_date.isoformat(), str(trip_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple[date, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        plan_date, trip_id = json.loads(raw)
+        return date.fromisoformat(plan_date), UUID(trip_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def _read_bulk_body(request: Request) -> bytes:
+    """Read a bulk import body, refusing it with 413 as soon as it exceeds TRIP_BULK_MAX_BYTES"""
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Request body too large (max {TRIP_BULK_MAX_BYTES} bytes)"
+    )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > TRIP_BULK_MAX_BYTES:
+        raise too_large
+    # Chunked bodies have no Content-Length, so count while reading as well
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > TRIP_BULK_MAX_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def _parse_bulk_body(body: bytes, content_type: str) -> list:
+    """Split a bulk import body into items: a JSON array, or NDJSON with one trip per line.
+
+    NDJSON lines are returned undecoded so each one is parsed and validated on
+    its own and a bad line only fails that row.
+    """
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        return [line for line in body.splitlines() if line.strip()]
+    try:
+        items = json.loads(body)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request body: {str(e)}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array of trips")
+    return items
+
+@router.post("/bulk")
+async def bulk_create_trips(request: Request):
+    items = _parse_bulk_body(await _read_bulk_body(request), request.headers.get("content-type", ""))
+    if len(items) > TRIP_BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many trips in one request (max {TRIP_BULK_MAX_ROWS})"
+        )
+
+    # Validate every row first and collect per-row errors instead of failing the batch
+    errors = []
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            if isinstance(item, bytes):
+                trip = TripCreate.model_validate_json(item)
+            else:
+                trip = TripCreate.model_validate(item)
+            valid.append((index, trip))
+        except ValidationError as e:
+            errors.append({"index": index, "error": e.errors(include_url=False, include_context=False)})
+
+    created = []
+    if valid:
+        # Decode data URIs and read local images before checking out a
+        # connection, so the disk reads never hold one
+        prepared_images = [await _prepare_trip_image(trip.imgLink) for _, trip in valid]
+
+        async with get_async_db_cursor() as cursor:
+            # One query resolves every referenced user
+            user_ids = list({str(trip.userId) for _, trip in valid})
+            await cursor.execute("SELECT userid FROM users WHERE userid = ANY(%s::uuid[])", [user_ids])
+            existing_users = {str(row["userid"]) for row in await cursor.fetchall()}
+
+            rows = []
+            images = {}
+            referenced_hashes = {}
+            for (index, trip), (image_hash, image, img_link) in zip(valid, prepared_images):
+                if str(trip.userId) not in existing_users:
+                    errors.append({"index": index, "error": "User not found"})
+                    continue
+                if image is not None:
+                    images[image_hash] = (image_hash, image[1], image[0])
+                elif image_hash is not None:
+                    referenced_hashes[len(rows)] = image_hash
+                # Ids are assigned here so each row maps back to its input
+                # index without relying on the order of RETURNING rows
+                trip_id = uuid4()
+                created.append({"index": index, "tripId": trip_id})
+                rows.append((
+                    str(trip_id),
+                    str(trip.userId),
+                    trip.destinationName,
+                    trip.planDate,
+                    trip.startDate,
+                    trip.endDate,
+                    trip.tripHighlights,
+                    trip.linkPdf,
+                    img_link,
+                    image_hash
+                ))
+
+            if referenced_hashes:
+                # Images we have no bytes for are only referenced if already stored
+                await cursor.execute(
+                    "SELECT contentHash FROM images WHERE contentHash = ANY(%s)",
+                    [list(set(referenced_hashes.values()) - images.keys())]
+                )
+                stored_hashes = {row["contenthash"] for row in await cursor.fetchall()} | images.keys()
+                for row_number, image_hash in referenced_hashes.items():
+                    if image_hash not in stored_hashes:
+                        rows[row_number] = rows[row_number][:-1] + (None,)
+
+            if images:
+                await cursor.execute_values("""
+                    INSERT INTO images (contentHash, mimeType, data)
+                    VALUES %s
+                    ON CONFLICT (contentHash) DO NOTHING
+                """, list(images.values()), page_size=50)
+
+            if rows:
+                try:
+                    await cursor.execute_values("""
+                        INSERT INTO trips (tripId, userId, destinationName, planDate, startDate, endDate, tripHighlights, linkPdf, imgLink, imageHash)
+                        VALUES %s
+                    """, rows, page_size=TRIP_BULK_PAGE_SIZE)
+                except ForeignKeyViolation:
+                    # A referenced user was deleted while the import was running
+                    raise HTTPException(
+                        status_code=409,
+                        detail="A referenced user was deleted during the import; no trips were created"
+                    )
+
+    errors.sort(key=lambda error: error["index"])
+    return {
+        "received": len(items),
+        "inserted": len(created),
+        "created": created,
+        "errors": errors
+    }
+
+@router.post("/batch", response_class=FastJSONResponse)
+async def get_trips_batch(batch: TripBatchRequest):
+    # Unique ids in request order; duplicates resolve to the same trip
+    trip_ids = list(dict.fromkeys(str(trip_id) for trip_id in batch.ids))
+
+    found = {}
+    misses = []
+    for trip_id in trip_ids:
+        cached = trip_cache.get(trip_id)
+        if cached is not None:
+            found[trip_id] = cached
+        else:
+            misses.append(trip_id)
+
+    if misses:
+        generation = trip_cache.generation()
+        async with get_async_db_cursor(cursor_factory=TupleCursor) as cursor:
+            await cursor.execute("""
+                SELECT 
+                    tripid as "tripId",
+                    userid as "userId",
+                    destinationname as "destinationName",
+                    plandate as "planDate",
+                    startdate as "startDate",
+                    enddate as "endDate",
+                    triphighlights as "tripHighlights",
+                    linkpdf as "linkPdf",
+                    COALESCE(%s || imagehash, imglink) as "imgLink"
+                FROM trips 
+                WHERE tripid = ANY(%s::uuid[])
+            """, [IMAGE_PATH_PREFIX, misses])
+            rows = await cursor.fetchall()
+        for row in rows:
+            trip = TripRecord(*row)
+            found[str(trip.tripId)] = trip
+            trip_cache.set(str(trip.tripId), trip, generation=generation)
+
+    return FastJSONResponse({
+        "trips": [_with_image_url(found[trip_id]) for trip_id in trip_ids if trip_id in found],
+        "missing": [trip_id for trip_id in trip_ids if trip_id not in found]
+    })
+
+@router.get("/user/{user_id}", response_class=FastJSONResponse)
+async def get_user_trips(
+    user_id: UUID,
+    limit: int = Query(TRIPS_PAGE_SIZE_DEFAULT, ge=1, le=TRIPS_PAGE_SIZE_MAX),
+    cursor: Optional[str] = None
+):
+    # Keyset pagination on (plandate, tripid): each page seeks straight to its
+    # position in idx_trips_userid_plandate, so deep pages cost the same as the first
+    after_clause = ""
+    params = []
+    if cursor:
+        after_clause = "AND (plandate, tripid) < (%s, %s)"
+        params.extend(str(value) for value in _decode_cursor(cursor))
+    # Fetch one extra row to know whether another page exists
+    params.extend([limit + 1, str(user_id)])
+    # Image path prefix comes first: it is used in the SELECT list
+    params.insert(0, IMAGE_PATH_PREFIX)
+
+    async with get_async_db_cursor(cursor_factory=TupleCursor) as db_cursor:
+        # Join from users so a missing user (no rows) can be told apart from
+        # a user without trips (one row of NULL trip columns)
+        await db_cursor.execute(f"""
+            SELECT 
+                t.tripid as "tripId",
+                t.userid as "userId",
+                t.destinationname as "destinationName",
+                t.plandate as "planDate",
+                t.startdate as "startDate",
+                t.enddate as "endDate",
+                t.triphighlights as "tripHighlights",
+                t.linkpdf as "linkPdf",
+                COALESCE(%s || t.imagehash, t.imglink) as "imgLink"
+            FROM users u
+            LEFT JOIN LATERAL (
+                SELECT *
+                FROM trips
+                WHERE userid = u.userid {after_clause}
+                ORDER BY plandate DESC, tripid DESC
+                LIMIT %s
+            ) t ON true
+            WHERE u.userid = %s
+            ORDER BY t.plandate DESC, t.tripid DESC
+        """, params)
         
-        if not user_exists:
-            raise HTTPException(status_code=404, detail="User not found")
+        rows = await db_cursor.fetchall()
+    if not rows:
+        raise HTTPException(status_code=404, detail="User not found")
+    if rows[0][0] is None:
+        # Return empty page instead of 404 for no trips
+        return FastJSONResponse({"trips": [], "nextCursor": None})
+
+    has_more = len(rows) > limit
+    trips = [TripRecord(*row) for row in rows[:limit]]
+    next_cursor = _encode_cursor(trips[-1].planDate, trips[-1].tripId) if has_more else None
+    return FastJSONResponse({"trips": [_with_image_url(trip) for trip in trips], "nextCursor": next_cursor})
 
+def _stream_user_trips_ndjson(user_id: UUID, image_url_prefix: str):
+    """Yield a user's trips as NDJSON, one server-side batch at a time.
+
+    This is a plain generator, so StreamingResponse runs it in the threadpool
+    and the blocking fetches stay off the event loop.
+    """
+    with get_db_cursor(name="trip_export", itersize=TRIP_EXPORT_BATCH_SIZE) as cursor:
         cursor.execute("""
             SELECT 
                 tripid as "tripId",
@@ -69,22 +405,40 @@ async def get_user_trips(user_id: UUID):
                 enddate as "endDate",
                 triphighlights as "tripHighlights",
                 linkpdf as "linkPdf",
-                imglink as "imgLink"
+                COALESCE(%s || imagehash, imglink) as "imgLink"
             FROM trips 
             WHERE userid = %s
-            ORDER BY plandate DESC
-        """, [str(user_id)])
-        
-        trips = cursor.fetchall()
-        if not trips:
-            # Return empty list instead of 404 for no trips
-            return []
-        return trips
+            ORDER BY plandate DESC, tripid DESC
+        """, [image_url_prefix, str(user_id)])
+        while True:
+            rows = cursor.fetchmany(TRIP_EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield "".join(json.dumps(row, default=str) + "\n" for row in rows)
 
-@router.get("/{trip_id}")
+@router.get("/user/{user_id}/export")
+async def export_user_trips(user_id: UUID):
+    # Check the user up front; once streaming starts the status code is sent
+    async with get_async_db_cursor() as cursor:
+        await cursor.execute("SELECT 1 FROM users WHERE userid = %s", [str(user_id)])
+        if not await cursor.fetchone():
+            raise HTTPException(status_code=404, detail="User not found")
+
+    return StreamingResponse(
+        _stream_user_trips_ndjson(user_id, image_url("")),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="trips-{user_id}.ndjson"'}
+    )
+
+@router.get("/{trip_id}", response_class=FastJSONResponse)
 async def get_trip(trip_id: UUID):
-    with get_db_cursor() as cursor:
-        cursor.execute("""
+    cached = trip_cache.get(str(trip_id))
+    if cached is not None:
+        return FastJSONResponse(_with_image_url(cached))
+
+    generation = trip_cache.generation()
+    async with get_async_db_cursor(cursor_factory=TupleCursor) as cursor:
+        await cursor.execute("""
             SELECT 
                 tripid as "tripId",
                 userid as "userId",
@@ -94,22 +448,23 @@ async def get_trip(trip_id: UUID):
                 enddate as "endDate",
                 triphighlights as "tripHighlights",
                 linkpdf as "linkPdf",
-                imglink as "imgLink"
+                COALESCE(%s || imagehash, imglink) as "imgLink"
             FROM trips 
             WHERE tripid = %s
-        """, [str(trip_id)])
+        """, [IMAGE_PATH_PREFIX, str(trip_id)])
         
-        trip = cursor.fetchone()
-        if trip is None:
-            raise HTTPException(status_code=404, detail="Trip not found")
-        return trip
+        row = await cursor.fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    trip = TripRecord(*row)
+    trip_cache.set(str(trip_id), trip, generation=generation)
+    return FastJSONResponse(_with_image_url(trip))
 
 @router.delete("/{trip_id}")
 async def delete_trip(trip_id: UUID):
-    with get_db_cursor() as cursor:
-        cursor.execute("SELECT tripid FROM trips WHERE tripid = %s", [str(trip_id)])
-        if not cursor.fetchone():
+    async with get_async_db_cursor() as cursor:
+        await cursor.execute("DELETE FROM trips WHERE tripid = %s", [str(trip_id)])
+        if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Trip not found")
-        
-        cursor.execute("DELETE FROM trips WHERE tripid = %s", [str(trip_id)])
-        return {"message": "Trip deleted successfully"}
\ No newline at end of file
+    trip_cache.invalidate(str(trip_id))
+    return {"message": "Trip deleted successfully"}
\ No newline at end of file
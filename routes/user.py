@@ -1,37 +1,64 @@
-from fastapi import APIRouter, HTTPException
-from database import get_db_cursor
-from models.user import UserCreate, UserLogin, UserUpdate
-from passlib.context import CryptContext
+from fastapi import APIRouter, Depends, HTTPException, Request
+from database import get_async_db_cursor
+from psycopg2.extensions import cursor as TupleCursor
+from psycopg2.errors import UniqueViolation
+from models.user import UserCreate, UserLogin, UserUpdate, UserRecord
 from datetime import timedelta
-from auth.jwt_handler import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from auth.jwt_handler import create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
+from auth.password import hash_password, verify_password
+from auth.rate_limiter import client_ip, login_email_limiter, login_ip_limiter
+from utils.cache import TTLCache
+from utils.json_response import FastJSONResponse
+from uuid import UUID
+import os
 
 router = APIRouter(
     prefix="/users",
     tags=["users"]
 )
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Read-through cache for profile lookups. Keys are ("id", user_id) and
+# ("email", lowercased email); writes through this router invalidate both.
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_MAXSIZE", "10000")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "300"))
+)
+
+def _user_id_key(user_id: str):
+    # Normalize so differently formatted UUIDs share one cache entry
+    try:
+        return ("id", str(UUID(user_id)))
+    except ValueError:
+        return ("id", user_id)
+
+def _email_key(email: str):
+    return ("email", email.lower())
 
 @router.post("/")
 async def create_user(user: UserCreate):
-    with get_db_cursor() as cursor:
+    # Hash the password before checking out a connection so the pool is not
+    # held for the duration of the bcrypt work
+    hashed_password = await hash_password(user.password)
+
+    async with get_async_db_cursor() as cursor:
         # Check if email already exists
-        cursor.execute("SELECT email FROM users WHERE email = %s", [user.email])
-        if cursor.fetchone():
+        await cursor.execute("SELECT email FROM users WHERE lower(email) = lower(%s)", [user.email])
+        if await cursor.fetchone():
             raise HTTPException(status_code=400, detail="Email already registered")
         
-        # Hash the password
-        hashed_password = pwd_context.hash(user.password)
-        
         # Insert new user with hashed password
-        cursor.execute("""
-            INSERT INTO users (fullName, email, password, address, phoneNumber)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING userid as "userId", fullname as "fullName", email
-        """, [user.fullName, user.email, hashed_password, user.address, user.phoneNumber])
+        try:
+            await cursor.execute("""
+                INSERT INTO users (fullName, email, password, address, phoneNumber)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING userid as "userId", fullname as "fullName", email
+            """, [user.fullName, user.email, hashed_password, user.address, user.phoneNumber])
+        except UniqueViolation:
+            # Registered concurrently after the check above
+            raise HTTPException(status_code=400, detail="Email already registered")
         
-        new_user = cursor.fetchone()
+        new_user = await cursor.fetchone()
+        user_cache.invalidate(_email_key(new_user["email"]), _user_id_key(str(new_user["userId"])))
         
         # Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -48,49 +75,62 @@ async def create_user(user: UserCreate):
         }
 
 @router.post("/login")
-async def login(user_credentials: UserLogin):
-    with get_db_cursor() as cursor:
+async def login(user_credentials: UserLogin, request: Request):
+    # Throttle before any database or bcrypt work so credential stuffing
+    # cannot be used to burn CPU
+    email_key = user_credentials.email.lower()
+    login_ip_limiter.check(client_ip(request))
+    login_email_limiter.check(email_key)
+
+    async with get_async_db_cursor() as cursor:
         # Get user by email
-        cursor.execute("""
+        await cursor.execute("""
             SELECT 
                 userid as "userId",
                 email,
                 password,
                 fullname as "fullName"
             FROM users 
-            WHERE email = %s
+            WHERE lower(email) = lower(%s)
         """, [user_credentials.email])
-        user = cursor.fetchone()
-        
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid email or password")
-        
-        # Verify password
-        if not verify_password(user_credentials.password, user["password"]):
-            raise HTTPException(status_code=401, detail="Invalid email or password")
-        
-        # Create access token
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user["email"], "user_id": str(user["userId"]), "full_name": user["fullName"]},
-            expires_delta=access_token_expires
-        )
-        
-        # Return user info and token
-        return {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "user": {
-                "userId": user["userId"],
-                "email": user["email"],
-                "fullName": user["fullName"]
-            }
+        user = await cursor.fetchone()
+    
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    
+    # Verify password (off the event loop, after the connection is released)
+    if not await verify_password(user_credentials.password, user["password"]):
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    login_email_limiter.reset(email_key)
+    
+    # Create access token
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user["email"], "user_id": str(user["userId"]), "full_name": user["fullName"]},
+        expires_delta=access_token_expires
+    )
+    
+    # Return user info and token
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user": {
+            "userId": user["userId"],
+            "email": user["email"],
+            "fullName": user["fullName"]
         }
+    }
 
-@router.get("/{user_id}")
+@router.get("/{user_id}", response_class=FastJSONResponse, dependencies=[Depends(get_current_user)])
 async def get_user_by_id(user_id: str):
-    with get_db_cursor() as cursor:
-        cursor.execute("""
+    cache_key = _user_id_key(user_id)
+    cached = user_cache.get(cache_key)
+    if cached is not None:
+        return FastJSONResponse(cached)
+
+    generation = user_cache.generation()
+    async with get_async_db_cursor(cursor_factory=TupleCursor) as cursor:
+        await cursor.execute("""
             SELECT 
                 userid as "userId",
                 fullname as "fullName",
@@ -100,15 +140,23 @@ async def get_user_by_id(user_id: str):
             FROM users 
             WHERE userid = %s
         """, [user_id])
-        user = cursor.fetchone()
-        if user is None:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user
+        row = await cursor.fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    user = UserRecord(*row)
+    user_cache.set(cache_key, user, generation=generation)
+    return FastJSONResponse(user)
 
-@router.get("/email/{email}")
+@router.get("/email/{email}", response_class=FastJSONResponse, dependencies=[Depends(get_current_user)])
 async def get_user(email: str):
-    with get_db_cursor() as cursor:
-        cursor.execute("""
+    cache_key = _email_key(email)
+    cached = user_cache.get(cache_key)
+    if cached is not None:
+        return FastJSONResponse(cached)
+
+    generation = user_cache.generation()
+    async with get_async_db_cursor(cursor_factory=TupleCursor) as cursor:
+        await cursor.execute("""
             SELECT 
                 userid as "userId",
                 fullname as "fullName",
@@ -116,25 +164,18 @@ async def get_user(email: str):
                 address,
                 phonenumber as "phoneNumber"
             FROM users 
-            WHERE email = %s
+            WHERE lower(email) = lower(%s)
         """, [email])
-        user = cursor.fetchone()
-        if user is None:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+        row = await cursor.fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    user = UserRecord(*row)
+    user_cache.set(cache_key, user, generation=generation)
+    return FastJSONResponse(user)
 
-@router.put("/{user_id}")
+@router.put("/{user_id}", dependencies=[Depends(get_current_user)])
 async def update_user(user_id: str, user_update: UserUpdate):
-    with get_db_cursor() as cursor:
-        # Check if user exists
-        cursor.execute("SELECT userid FROM users WHERE userid = %s", [user_id])
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="User not found")
-        
+    async with get_async_db_cursor() as cursor:
         # Update user fields
         update_fields = []
         update_values = []
@@ -152,6 +193,10 @@ async def update_user(user_id: str, user_update: UserUpdate):
             update_values.append(user_update.phoneNumber)
             
         if not update_fields:
+            # Nothing to write, but still report unknown users
+            await cursor.execute("SELECT userid FROM users WHERE userid = %s", [user_id])
+            if not await cursor.fetchone():
+                raise HTTPException(status_code=404, detail="User not found")
             return {"message": "No fields to update"}
             
         # Construct and execute update query
@@ -167,7 +212,10 @@ async def update_user(user_id: str, user_update: UserUpdate):
                 phonenumber as "phoneNumber"
         """
         
-        cursor.execute(update_query, update_values + [user_id])
-        updated_user = cursor.fetchone()
-        
-        return updated_user
+        await cursor.execute(update_query, update_values + [user_id])
+        updated_user = await cursor.fetchone()
+        if updated_user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+
+    user_cache.invalidate(_user_id_key(user_id), _email_key(updated_user["email"]))
+    return updated_user
@@ -0,0 +1,138 @@
+import os
+import sys
+import tempfile
+from contextlib import asynccontextmanager
+import pytest
+
+# Modules read their configuration at import time, so set it before any app import
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("IMAGE_CACHE_DIR", tempfile.mkdtemp(prefix="image_cache_"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class FakeCursor:
+    """Stands in for database.AsyncCursor and records every statement.
+
+    Each execute() consumes the next scripted result: a list of rows, an int
+    rowcount for statements without rows, or an exception to raise.
+    """
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.queries = []
+        self.rowcount = -1
+        self._rows = []
+
+    def _next(self, query, params):
+        self.queries.append((query, params))
+        result = self.results.pop(0) if self.results else []
+        if isinstance(result, Exception):
+            raise result
+        if isinstance(result, int):
+            self._rows = []
+            self.rowcount = result
+        else:
+            self._rows = list(result)
+            self.rowcount = len(self._rows)
+
+    async def execute(self, query, vars=None):
+        self._next(query, vars)
+
+    async def execute_values(self, query, argslist, template=None, page_size=100, fetch=False):
+        self._next(query, argslist)
+        if fetch:
+            return await self.fetchall()
+
+    async def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    async def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Point a module's get_async_db_cursor at a FakeCursor with scripted results"""
+    def install(module, *results):
+        cursor = FakeCursor(results)
+
+        @asynccontextmanager
+        async def get_async_db_cursor(cursor_factory=None):
+            yield cursor
+
+        monkeypatch.setattr(module, "get_async_db_cursor", get_async_db_cursor)
+        return cursor
+    return install
+
+@pytest.fixture
+def travel_request():
+    """Build a TravelRequest for a destination (or a specific place) with fixed preferences"""
+    from models.destination import TravelRequest
+
+    def build(destination: str = "Portugal", specific_place: str | None = None) -> TravelRequest:
+        basic_info = {"startDate": "2024-06-01", "endDate": "2024-06-08", "travelers": 2}
+        if specific_place is not None:
+            basic_info.update(isSpecificPlace=True, specificPlace=specific_place)
+        else:
+            basic_info.update(isSpecificPlace=False, destination=destination)
+        return TravelRequest.model_validate({
+            "basicInfo": basic_info,
+            "travelPreferences": {"tripStyles": ["Relaxed"], "accommodation": ["Hotel"], "transportation": ["Train"]},
+            "diningPreferences": ["Local"],
+            "activities": ["Walking"]
+        })
+    return build
+
+@pytest.fixture
+def fake_provider():
+    """Provider class answering with one destination per city, after delay seconds.
+
+    Cities default to the provider's name; every image resolves to content_hash.
+    """
+    import asyncio
+    import json
+    from providers.base import RecommendationProvider
+
+    class FakeProvider(RecommendationProvider):
+        def __init__(self, name: str = "fake", delay: float = 0.0, error: Exception | None = None,
+                     cities: list[str] | None = None, content_hash: str = "ef" * 32,
+                     supports_streaming: bool = True):
+            self.name = name
+            self.label = name.title()
+            super().__init__()
+            self.delay = delay
+            self.error = error
+            self.cities = cities or [name]
+            self.content_hash = content_hash
+            self.supports_streaming = supports_streaming
+
+        def create_travel_prompt(self, request) -> str:
+            return f"{self.name}: {request.basicInfo.destination}"
+
+        def _content(self) -> str:
+            return json.dumps({"destinations": [
+                {"destination": {"city": city, "country": "Portugal"}, "description": "d", "highlights": ["h"]}
+                for city in self.cities
+            ]})
+
+        async def _complete(self, prompt: str) -> str:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return self._content()
+
+        async def complete_stream(self, prompt: str):
+            assert self.supports_streaming
+            content = self._content()
+            for start in range(0, len(content), 16):
+                yield content[start:start + 16]
+
+        async def _generate_image(self, cache_key: str, city: str, location: str, is_us_state: bool) -> str | None:
+            # Skips the image cache and store; every image is content_hash
+            return self.content_hash
+
+        async def _render_image(self, city: str, location: str, is_us_state: bool) -> tuple[bytes, str]:
+            raise AssertionError("images are faked in _generate_image")
+
+    return FakeProvider
@@ -0,0 +1,62 @@
+import asyncio
+from datetime import timedelta
+from uuid import uuid4
+import httpx
+from auth.jwt_handler import create_access_token
+from routes import trip as trip_routes
+
+USER_ID = str(uuid4())
+
+def _post_bulk(content, headers=None) -> httpx.Response:
+    from main import app
+    token = create_access_token({"sub": "test@example.com"}, expires_delta=timedelta(minutes=5))
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await client.post(
+                "/trips/bulk",
+                content=content,
+                headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json", **(headers or {})}
+            )
+    return asyncio.run(run())
+
+def _trip(name: str) -> str:
+    return (
+        f'{{"userId": "{USER_ID}", "destinationName": "{name}", '
+        '"planDate": "2024-05-01", "startDate": "2024-06-01", "endDate": "2024-06-08"}'
+    )
+
+def test_oversized_content_length_is_rejected_before_reading(fake_db, monkeypatch):
+    monkeypatch.setattr(trip_routes, "TRIP_BULK_MAX_BYTES", 100)
+    cursor = fake_db(trip_routes)
+    response = _post_bulk(b"[" + b" " * 200 + b"]")
+    assert response.status_code == 413
+    assert cursor.queries == []
+
+def test_oversized_chunked_body_is_rejected_while_streaming(fake_db, monkeypatch):
+    monkeypatch.setattr(trip_routes, "TRIP_BULK_MAX_BYTES", 100)
+    cursor = fake_db(trip_routes)
+
+    async def chunks():
+        for _ in range(10):
+            yield b" " * 50
+
+    response = _post_bulk(chunks())
+    assert response.status_code == 413
+    assert cursor.queries == []
+
+def test_created_trips_map_to_their_input_index(fake_db):
+    cursor = fake_db(trip_routes, [{"userid": USER_ID}], 2)
+    response = _post_bulk(f'[{_trip("Lisbon")}, {{"userId": "not-a-uuid"}}, {_trip("Porto")}]')
+    assert response.status_code == 200
+    body = response.json()
+    assert [created["index"] for created in body["created"]] == [0, 2]
+    assert [error["index"] for error in body["errors"]] == [1]
+
+    # The ids reported per index are the ones inserted with those rows
+    inserted_rows = cursor.queries[-1][1]
+    assert [(row[0], row[2]) for row in inserted_rows] == [
+        (body["created"][0]["tripId"], "Lisbon"),
+        (body["created"][1]["tripId"], "Porto"),
+    ]
@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from providers.base import RecommendationProvider
+from providers.engine import RecommendationEngine
+from utils import image_store
+from utils.data_uri import to_data_uri
+from utils.recommendation_cache import canonical_request_key, recommendation_cache
+
+def test_provider_must_implement_the_abstract_methods():
+    class Incomplete(RecommendationProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_failover_response_names_the_serving_provider(fake_provider, travel_request):
+    primary = fake_provider("primary", error=RuntimeError("down"))
+    engine = RecommendationEngine([primary, fake_provider("secondary")], hedging=False, failover=True)
+    request = travel_request("Failover")
+
+    result = asyncio.run(engine.generate(request, "primary"))
+    assert result["provider"] == "secondary"
+    assert result["destinations"][0]["destination"]["city"] == "secondary"
+    assert primary.stats.stats()["failures"] == 1
+    # The cached copy under the requested provider still says who answered
+    cached = recommendation_cache.namespace("primary").get(canonical_request_key(request))
+    assert cached["provider"] == "secondary"
+    assert asyncio.run(engine.generate(request, "primary"))["provider"] == "secondary"
+
+def test_error_is_labelled_with_the_provider_that_failed(fake_provider, travel_request):
+    engine = RecommendationEngine(
+        [fake_provider("primary", error=RuntimeError("quota")), fake_provider("secondary", error=RuntimeError("down"))],
+        hedging=False,
+        failover=True
+    )
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(engine.generate(travel_request("Errors"), "secondary"))
+    assert excinfo.value.detail == "Secondary API Error: down"
+
+def test_losing_hedge_still_records_its_latency(fake_provider, travel_request):
+    primary = fake_provider("primary", delay=1.0)
+    for _ in range(primary.stats.min_samples):
+        primary.stats.record_success(0.05)
+    engine = RecommendationEngine([primary, fake_provider("secondary")], hedging=True, failover=False)
+
+    result = asyncio.run(engine.generate(travel_request("Hedging"), "primary"))
+    assert result["provider"] == "secondary"
+    stats = primary.stats.stats()
+    assert stats["samples"] == primary.stats.min_samples + 1
+    assert stats["failures"] == 0
+    # The cancelled attempt ran for at least the hedge delay
+    assert max(latency for _, latency in primary.stats._samples) >= 0.05
+
+def test_base_class_caches_and_stores_rendered_images(fake_provider, fake_db):
+    class Rendering(fake_provider):
+        renders = 0
+        # Undo the fake's shortcut so images go through the cache and store
+        _generate_image = RecommendationProvider._generate_image
+
+        async def _render_image(self, city, location, is_us_state):
+            self.renders += 1
+            return f"{city} image".encode(), "image/png"
+
+    provider = Rendering("rendering")
+    fake_db(image_store)
+    first = asyncio.run(provider.stored_image("Sintra", "Portugal", False))
+    assert asyncio.run(provider.stored_image("Sintra", "Portugal", False)) == first
+    assert provider.renders == 1
+
+    # When the images table is unavailable the image is inlined instead
+    fake_db(image_store, RuntimeError("database down"))
+    inlined = asyncio.run(provider.stored_image("Evora", "Portugal", False))
+    assert inlined == to_data_uri(b"Evora image", "image/png")
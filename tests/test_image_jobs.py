@@ -0,0 +1,49 @@
+import asyncio
+from utils.deadline import deadline_at, request_deadline
+from utils.image_cache import request_base_url
+from utils.image_jobs import ImageJobQueue
+from utils.retry import RetryPolicy
+
+def test_workers_do_not_inherit_the_first_requests_deadline():
+    queue = ImageJobQueue(workers=2, max_queue=10, result_ttl=60)
+    seen_deadlines = []
+
+    async def generate():
+        seen_deadlines.append(deadline_at())
+        # Retries clamp to the request deadline, which is what used to expire
+        return await RetryPolicy(max_attempts=1, budget=5).run(lambda: asyncio.sleep(0.01, result="hash"))
+
+    async def run():
+        # The first request starts the workers and then finishes
+        with request_deadline(0.05):
+            first = queue.submit("first", generate)
+            await queue.wait(first.id, 1)
+        await asyncio.sleep(0.1)
+        # A later request, long after the first one's deadline
+        second = queue.submit("second", generate)
+        await queue.wait(second.id, 1)
+        await queue.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert (first.status, first.result) == ("done", "hash")
+    assert (second.status, second.result) == ("done", "hash")
+    assert seen_deadlines == [None, None]
+
+def test_workers_do_not_see_the_submitting_requests_context():
+    queue = ImageJobQueue(workers=1, max_queue=10, result_ttl=60)
+    seen = []
+
+    async def generate():
+        seen.append((deadline_at(), request_base_url.get()))
+        return "hash"
+
+    async def run():
+        request_base_url.set("http://first-request/")
+        with request_deadline(30):
+            job = queue.submit("key", generate)
+            await queue.wait(job.id, 1)
+        await queue.close()
+
+    asyncio.run(run())
+    assert seen == [(None, "")]
@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import json
+from datetime import date
+from uuid import uuid4
+import httpx
+from models.trip import TripCreate
+from routes import image_route
+from routes import trip as trip_routes
+from utils import image_store
+from utils.image_cache import ImageCache, image_url
+
+def _get(path: str) -> httpx.Response:
+    from main import app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await client.get(path)
+    return asyncio.run(run())
+
+def test_generated_image_is_saved_to_images_table_before_it_is_served(fake_db):
+    cursor = fake_db(image_store)
+    content_hash = asyncio.run(image_store.save_generated_image("key", b"image bytes", "image/png"))
+    assert content_hash == hashlib.sha256(b"image bytes").hexdigest()
+    query, params = cursor.queries[0]
+    assert "INSERT INTO images" in query
+    assert params == [content_hash, "image/png", b"image bytes"]
+
+def test_evicted_image_is_still_served(fake_db, monkeypatch, tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=10)
+    monkeypatch.setattr(image_store, "image_cache", cache)
+    monkeypatch.setattr(image_route, "image_cache", cache)
+    fake_db(image_store)
+    first = asyncio.run(image_store.save_generated_image("first", b"first image", "image/png"))
+    asyncio.run(image_store.save_generated_image("second", b"second image", "image/png"))
+    assert cache.blob_info(first) is None
+
+    cursor = fake_db(image_route, [(b"first image", "image/png")])
+    response = _get(f"/images/{first}")
+    assert response.status_code == 200
+    assert response.content == b"first image"
+    assert cursor.queries[0][1] == [first]
+
+def test_trip_keeps_reference_to_image_missing_locally(fake_db):
+    content_hash = "ab" * 32
+    link = image_url(content_hash)
+    cursor = fake_db(trip_routes, [{"tripId": uuid4(), "imgLink": None}])
+    asyncio.run(trip_routes.create_trip(TripCreate(
+        userId=uuid4(),
+        destinationName="Lisbon",
+        planDate=date(2024, 5, 1),
+        startDate=date(2024, 6, 1),
+        endDate=date(2024, 6, 8),
+        imgLink=link
+    )))
+    query, params = cursor.queries[0]
+    assert "(SELECT contentHash FROM images WHERE contentHash = %s)" in query
+    assert content_hash in params and link in params
+
+def test_cache_hits_persist_access_order_across_restarts(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=1000, flush_interval=0)
+    cache.put("first", b"first image", "image/png")
+    cache.put("second", b"second image", "image/png")
+    assert cache.get_hash("first") is not None
+
+    # Reloading with room for one image keeps the one read most recently
+    reloaded = ImageCache(str(tmp_path), max_bytes=15)
+    assert reloaded.get_hash("first") is not None
+    assert reloaded.get_hash("second") is None
+    assert reloaded.stats()["evictions"] == 1
+
+def test_cache_hits_are_flushed_on_demand(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=1000, flush_interval=3600)
+    cache.put("first", b"first image", "image/png")
+    cache.put("second", b"second image", "image/png")
+
+    def persisted_order():
+        with open(tmp_path / "index.json", encoding="utf-8") as f:
+            entries = json.load(f)
+        return sorted(entries, key=lambda key: entries[key]["last_access"])
+
+    cache.get_hash("first")
+    assert persisted_order() == ["first", "second"]
+    cache.flush()
+    assert persisted_order() == ["second", "first"]
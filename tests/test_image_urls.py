@@ -0,0 +1,55 @@
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import date
+from uuid import uuid4
+from providers.engine import _render
+from routes import trip as trip_routes
+from utils.image_cache import request_base_url
+
+CONTENT_HASH = "ab" * 32
+
+def _get_trip_from(base_url: str, trip_id):
+    token = request_base_url.set(base_url)
+    try:
+        return asyncio.run(trip_routes.get_trip(trip_id))
+    finally:
+        request_base_url.reset(token)
+
+def test_cached_trip_image_url_follows_the_request_origin(fake_db):
+    trip_id = uuid4()
+    row = (trip_id, uuid4(), "Lisbon", date(2024, 5, 1), date(2024, 6, 1), date(2024, 6, 8), None, None, f"/images/{CONTENT_HASH}")
+    cursor = fake_db(trip_routes, [row])
+    first = _get_trip_from("http://internal:8000/", trip_id)
+    second = _get_trip_from("https://api.example.com/", trip_id)
+    # The second response came from trip_cache, yet carries its own origin
+    assert len(cursor.queries) == 1
+    assert f'"imgLink":"http://internal:8000/images/{CONTENT_HASH}"'.encode() in first.body
+    assert f'"imgLink":"https://api.example.com/images/{CONTENT_HASH}"'.encode() in second.body
+
+def test_cached_recommendation_image_urls_follow_the_request_origin():
+    cached = {"destinations": [{"description": "d"}, {"description": "e"}], "images": [CONTENT_HASH, "data:image/png;base64,AA=="], "partial": False, "provider": "gemini"}
+    token = request_base_url.set("https://api.example.com/")
+    try:
+        rendered = _render(cached)
+    finally:
+        request_base_url.reset(token)
+    assert [dest["imageUrl"] for dest in rendered["destinations"]] == [
+        f"https://api.example.com/images/{CONTENT_HASH}",
+        "data:image/png;base64,AA=="
+    ]
+    assert "imageUrl" not in cached["destinations"][0]
+
+def test_migrations_import_has_no_side_effects(tmp_path):
+    image_dir = tmp_path / "image_cache"
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, migrations; print('fastapi' in sys.modules)"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env={**os.environ, "IMAGE_CACHE_DIR": str(image_dir)},
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    assert result.stdout.strip() == "False"
+    assert not image_dir.exists()
@@ -0,0 +1,41 @@
+import asyncio
+import httpx
+from auth import rate_limiter
+from routes import user as user_routes
+
+def _login(headers: dict) -> httpx.Response:
+    from main import app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app, client=("10.0.0.1", 1234))
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await client.post(
+                "/users/login",
+                json={"email": "nobody@example.com", "password": "wrong"},
+                headers=headers
+            )
+    return asyncio.run(run())
+
+def _isolate_limiters(monkeypatch, ip_limit: int):
+    backend = rate_limiter.InMemorySlidingWindowBackend(max_keys=100)
+    monkeypatch.setattr(rate_limiter.login_ip_limiter, "backend", backend)
+    monkeypatch.setattr(rate_limiter.login_ip_limiter, "limit", ip_limit)
+    monkeypatch.setattr(rate_limiter.login_email_limiter, "backend", backend)
+    monkeypatch.setattr(rate_limiter.login_email_limiter, "limit", 100)
+
+def test_forwarded_ips_from_trusted_proxy_get_separate_buckets(fake_db, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "FORWARDED_ALLOW_IPS", {"10.0.0.1"})
+    _isolate_limiters(monkeypatch, ip_limit=1)
+    fake_db(user_routes, [], [], [])
+
+    assert _login({"X-Forwarded-For": "203.0.113.5"}).status_code == 401
+    assert _login({"X-Forwarded-For": "198.51.100.7, 10.0.0.1"}).status_code == 401
+    assert _login({"X-Forwarded-For": "203.0.113.5"}).status_code == 429
+
+def test_forwarded_for_is_ignored_from_untrusted_peers(fake_db, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "FORWARDED_ALLOW_IPS", set())
+    _isolate_limiters(monkeypatch, ip_limit=1)
+    fake_db(user_routes, [], [])
+
+    assert _login({"X-Forwarded-For": "203.0.113.5"}).status_code == 401
+    assert _login({"X-Forwarded-For": "198.51.100.7"}).status_code == 429
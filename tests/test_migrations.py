@@ -0,0 +1,95 @@
+import asyncio
+import os
+from uuid import uuid4
+import psycopg2
+import pytest
+import database
+from fastapi import HTTPException
+from migrations import _make_email_lookup_unique, run_migrations
+from routes import trip as trip_routes
+from routes import user as user_routes
+
+# Applying migrations and EXPLAIN need a real, disposable Postgres database
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+class _SyncCursor:
+    """Minimal stand-in for a psycopg2 dict cursor inside run_migrations()"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def execute(self, query, vars=None):
+        self.queries.append(" ".join(query.split()))
+
+    def fetchall(self):
+        return self.rows
+
+def test_email_uniqueness_migration_stops_on_case_duplicates():
+    cursor = _SyncCursor([{"email": "ana@example.com", "accounts": 2}])
+    with pytest.raises(RuntimeError, match="1 emails are registered more than once"):
+        _make_email_lookup_unique(cursor)
+    assert not any("CREATE UNIQUE INDEX" in query for query in cursor.queries)
+
+def test_email_uniqueness_migration_replaces_the_plain_index():
+    cursor = _SyncCursor([])
+    _make_email_lookup_unique(cursor)
+    assert cursor.queries[1:] == [
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_lower_unique ON users (lower(email))",
+        "DROP INDEX IF EXISTS idx_users_email_lower",
+    ]
+
+@pytest.fixture(scope="module")
+def db():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    database.close_pool()
+    original_url = database.DATABASE_URL
+    database.DATABASE_URL = TEST_DATABASE_URL
+    try:
+        run_migrations()
+        conn = psycopg2.connect(TEST_DATABASE_URL)
+        yield conn
+        conn.close()
+    finally:
+        database.close_pool()
+        database.DATABASE_URL = original_url
+
+def _plan(conn, query, params) -> str:
+    """EXPLAIN a query as the planner would run it against a large table"""
+    with conn.cursor() as cursor:
+        # The test tables are tiny, where a sequential scan is always cheapest
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("EXPLAIN " + query, params)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+    conn.rollback()
+    return plan
+
+def test_migrations_are_idempotent(db):
+    assert run_migrations() == []
+
+def test_email_lookup_uses_unique_lower_email_index(db, fake_db):
+    cursor = fake_db(user_routes, [])
+    with pytest.raises(HTTPException):
+        asyncio.run(user_routes.get_user(f"{uuid4()}@Example.com"))
+    query, params = cursor.queries[0]
+    assert "idx_users_email_lower_unique" in _plan(db, query, params)
+
+def test_trip_listing_uses_userid_plandate_index(db, fake_db):
+    cursor = fake_db(trip_routes, [])
+    with pytest.raises(HTTPException):
+        asyncio.run(trip_routes.get_user_trips(uuid4(), limit=10, cursor=None))
+    query, params = cursor.queries[0]
+    assert "idx_trips_userid_plandate" in _plan(db, query, params)
+
+def test_email_is_unique_ignoring_case(db):
+    email = f"{uuid4()}@example.com"
+    with db.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users (fullName, email, password) VALUES ('A', %s, 'x')", [email]
+        )
+        with pytest.raises(psycopg2.errors.UniqueViolation):
+            cursor.execute(
+                "INSERT INTO users (fullName, email, password) VALUES ('B', %s, 'x')", [email.upper()]
+            )
+    db.rollback()
@@ -0,0 +1,104 @@
+import asyncio
+import base64
+import json
+import socket
+import threading
+import time
+import httpx
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from openai import AsyncOpenAI
+from providers import openai_provider
+from utils import image_store
+from utils.recommendation_cache import recommendation_cache
+
+# Each stubbed completion takes this long, like a (much faster) GPT-4 call
+STUB_DELAY_SECONDS = 0.5
+CONCURRENT_REQUESTS = 4
+
+class _StubOpenAI:
+    """A local stand-in for the OpenAI API that counts overlapping calls"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self.chat_completion)
+        self.app.post("/v1/images/generations")(self.image_generation)
+
+    async def chat_completion(self, body: dict):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(STUB_DELAY_SECONDS)
+        finally:
+            self.in_flight -= 1
+        # Answer with a destination named after the prompt so requests stay distinct
+        city = body["messages"][-1]["content"].split("travel information for ")[1].split(":")[0]
+        content = json.dumps({"destinations": [{
+            "destination": {"city": city, "country": "Portugal"},
+            "description": "A stubbed destination.",
+            "highlights": ["Stub highlight"]
+        }]})
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }]
+        }
+
+    async def image_generation(self, body: dict):
+        return {"created": 0, "data": [{"b64_json": base64.b64encode(body["prompt"].encode()).decode()}]}
+
+@pytest.fixture
+def stub_openai(monkeypatch):
+    stub = _StubOpenAI()
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(stub.app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    port = sock.getsockname()[1]
+    client = AsyncOpenAI(api_key="test", base_url=f"http://127.0.0.1:{port}/v1", max_retries=0)
+    monkeypatch.setattr(openai_provider, "myOpenAI", client)
+    yield stub
+    server.should_exit = True
+    thread.join()
+
+def test_concurrent_openai_requests_overlap(stub_openai, fake_db, travel_request):
+    from main import app
+    fake_db(image_store)
+    recommendation_cache.namespace("openai").clear()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=30) as client:
+            started = time.monotonic()
+            responses = await asyncio.gather(*[
+                client.post(
+                    "/openai/generate-recommendations",
+                    json=travel_request(specific_place=f"Lisbon {index}").model_dump(exclude_none=True)
+                )
+                for index in range(CONCURRENT_REQUESTS)
+            ])
+            return responses, time.monotonic() - started
+
+    responses, elapsed = asyncio.run(run())
+    assert [response.status_code for response in responses] == [200] * CONCURRENT_REQUESTS
+    for index, response in enumerate(responses):
+        destination = response.json()["destinations"][0]
+        assert destination["destination"]["city"] == f"Lisbon {index}"
+        assert "/images/" in destination["imageUrl"]
+    # Every completion was in flight at the stub at the same time ...
+    assert stub_openai.max_in_flight == CONCURRENT_REQUESTS
+    # ... so the batch took about one call's latency, not the sum of them
+    assert elapsed < STUB_DELAY_SECONDS * CONCURRENT_REQUESTS / 2
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import date
+from uuid import uuid4
+import pytest
+from fastapi import HTTPException
+from models.trip import TripCreate
+from models.user import UserUpdate
+from routes import trip as trip_routes
+from routes import user as user_routes
+
+USER_ID = uuid4()
+TRIP_ID = uuid4()
+
+def _trip_create(**overrides):
+    fields = {
+        "userId": USER_ID,
+        "destinationName": "Lisbon",
+        "planDate": date(2024, 5, 1),
+        "startDate": date(2024, 6, 1),
+        "endDate": date(2024, 6, 8),
+    }
+    fields.update(overrides)
+    return TripCreate(**fields)
+
+def _trip_row(trip_id=TRIP_ID):
+    return (trip_id, USER_ID, "Lisbon", date(2024, 5, 1), date(2024, 6, 1), date(2024, 6, 8), None, None, None)
+
+def test_create_trip_is_one_statement(fake_db):
+    cursor = fake_db(trip_routes, [{"tripId": TRIP_ID, "userId": USER_ID, "imgLink": None}])
+    created = asyncio.run(trip_routes.create_trip(_trip_create()))
+    assert created["tripId"] == TRIP_ID
+    assert len(cursor.queries) == 1
+
+def test_create_trip_with_data_uri_stores_image_in_same_statement(fake_db):
+    cursor = fake_db(trip_routes, [{"tripId": TRIP_ID, "userId": USER_ID, "imgLink": None}])
+    asyncio.run(trip_routes.create_trip(_trip_create(imgLink="data:image/png;base64,aGVsbG8=")))
+    assert len(cursor.queries) == 1
+    assert "INSERT INTO images" in cursor.queries[0][0]
+
+def test_create_trip_unknown_user_is_404_after_one_statement(fake_db):
+    cursor = fake_db(trip_routes, [])
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(trip_routes.create_trip(_trip_create()))
+    assert excinfo.value.status_code == 404
+    assert len(cursor.queries) == 1
+
+def test_get_user_trips_is_one_statement(fake_db):
+    cursor = fake_db(trip_routes, [_trip_row()])
+    response = asyncio.run(trip_routes.get_user_trips(USER_ID, limit=10, cursor=None))
+    assert response.status_code == 200
+    assert len(cursor.queries) == 1
+
+def test_get_user_trips_without_trips_is_empty_page(fake_db):
+    cursor = fake_db(trip_routes, [(None,) * 9])
+    response = asyncio.run(trip_routes.get_user_trips(USER_ID, limit=10, cursor=None))
+    assert response.body == b'{"trips":[],"nextCursor":null}'
+    assert len(cursor.queries) == 1
+
+def test_get_user_trips_unknown_user_is_404_after_one_statement(fake_db):
+    cursor = fake_db(trip_routes, [])
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(trip_routes.get_user_trips(USER_ID, limit=10, cursor=None))
+    assert excinfo.value.status_code == 404
+    assert len(cursor.queries) == 1
+
+def test_delete_trip_is_one_statement(fake_db):
+    cursor = fake_db(trip_routes, 1)
+    asyncio.run(trip_routes.delete_trip(TRIP_ID))
+    assert len(cursor.queries) == 1
+    assert cursor.queries[0][0].startswith("DELETE")
+
+def test_delete_missing_trip_is_404_after_one_statement(fake_db):
+    cursor = fake_db(trip_routes, 0)
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(trip_routes.delete_trip(TRIP_ID))
+    assert excinfo.value.status_code == 404
+    assert len(cursor.queries) == 1
+
+def test_update_user_is_one_statement(fake_db):
+    row = {"userId": USER_ID, "fullName": "Ana", "email": "ana@example.com", "address": None, "phoneNumber": None}
+    cursor = fake_db(user_routes, [row])
+    updated = asyncio.run(user_routes.update_user(str(USER_ID), UserUpdate(fullName="Ana")))
+    assert updated == row
+    assert len(cursor.queries) == 1
+    assert "UPDATE users" in cursor.queries[0][0]
+
+def test_update_unknown_user_is_404_after_one_statement(fake_db):
+    cursor = fake_db(user_routes, [])
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(user_routes.update_user(str(USER_ID), UserUpdate(fullName="Ana")))
+    assert excinfo.value.status_code == 404
+    assert len(cursor.queries) == 1
+
+def test_update_user_without_fields_only_checks_existence(fake_db):
+    cursor = fake_db(user_routes, [{"userid": USER_ID}])
+    result = asyncio.run(user_routes.update_user(str(USER_ID), UserUpdate()))
+    assert result == {"message": "No fields to update"}
+    assert len(cursor.queries) == 1
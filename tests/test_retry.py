@@ -0,0 +1,134 @@
+import asyncio
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+import httpx
+import pytest
+from utils import retry
+from utils.retry import RetryableError, RetryPolicy, is_retryable, retry_after_seconds
+
+class _APIError(Exception):
+    """Shaped like the SDK errors: a status code and the HTTP response"""
+
+    def __init__(self, message="error", status_code=None, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = httpx.Response(status_code or 500, headers=headers or {})
+
+def _flaky(failures: list):
+    """Factory that raises each of failures in turn, then returns "ok"; counts its calls"""
+    calls = []
+
+    async def factory():
+        calls.append(time.monotonic())
+        if len(calls) <= len(failures):
+            raise failures[len(calls) - 1]
+        return "ok"
+    return factory, calls
+
+@pytest.mark.parametrize("attempt", range(1, 10))
+def test_backoff_is_full_jitter_capped_at_max_delay(attempt, monkeypatch):
+    policy = RetryPolicy(base_delay=0.5, max_delay=8)
+    ceiling = min(8, 0.5 * 2 ** (attempt - 1))
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: (low, high))
+    assert policy.backoff(attempt) == (0, ceiling)
+
+def test_backoff_samples_stay_within_bounds():
+    policy = RetryPolicy(base_delay=0.5, max_delay=8)
+    for attempt in range(1, 10):
+        ceiling = min(8, 0.5 * 2 ** (attempt - 1))
+        assert all(0 <= policy.backoff(attempt) <= ceiling for _ in range(200))
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"retry-after-ms": "1500"}, 1.5),
+    ({"retry-after-ms": "250", "retry-after": "9"}, 0.25),
+    ({"retry-after": "3"}, 3.0),
+    ({"retry-after": "-4"}, 0.0),
+    ({"retry-after": "soon"}, None),
+    ({}, None),
+])
+def test_retry_after_headers(headers, expected):
+    assert retry_after_seconds(_APIError(status_code=429, headers=headers)) == expected
+
+def test_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = retry_after_seconds(_APIError(status_code=503, headers={"retry-after": format_datetime(when, usegmt=True)}))
+    assert 28 <= delay <= 30
+
+def test_retry_after_without_response():
+    assert retry_after_seconds(ValueError("no response")) is None
+
+@pytest.mark.parametrize("error, expected", [
+    (_APIError(status_code=429), True),
+    (_APIError("Error code: 429 - insufficient_quota", status_code=429), False),
+    (_APIError(status_code=503), True),
+    (_APIError(status_code=400), False),
+    (_APIError(status_code=401), False),
+    (RetryableError("no image"), True),
+    (asyncio.TimeoutError(), True),
+    (httpx.ConnectError("refused"), True),
+    (ValueError("bad json"), False),
+    (None, False),
+])
+def test_is_retryable(error, expected):
+    assert is_retryable(error) is expected
+
+def _wrapped(cause: Exception) -> Exception:
+    try:
+        try:
+            raise cause
+        except Exception as e:
+            raise RuntimeError("Connection error.") from e
+    except RuntimeError as wrapper:
+        return wrapper
+
+def test_wrapped_transport_error_is_retryable():
+    assert is_retryable(_wrapped(httpx.ReadTimeout("timed out")))
+    assert is_retryable(_wrapped(_wrapped(httpx.ConnectError("refused"))))
+
+def test_wrapped_fatal_error_is_not_retryable():
+    assert not is_retryable(_wrapped(ValueError("bad input")))
+
+def test_run_retries_transient_failures():
+    factory, calls = _flaky([_APIError(status_code=503), httpx.ConnectError("refused")])
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01, budget=5)
+    assert asyncio.run(policy.run(factory)) == "ok"
+    assert len(calls) == 3
+
+def test_run_gives_up_after_max_attempts():
+    factory, calls = _flaky([_APIError(status_code=503)] * 5)
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01, budget=5)
+    with pytest.raises(_APIError):
+        asyncio.run(policy.run(factory))
+    assert len(calls) == 3
+
+def test_run_does_not_retry_insufficient_quota():
+    factory, calls = _flaky([_APIError("insufficient_quota", status_code=429)])
+    with pytest.raises(_APIError):
+        asyncio.run(RetryPolicy(max_attempts=5, base_delay=0.01, budget=5).run(factory))
+    assert len(calls) == 1
+
+def test_run_waits_for_retry_after_instead_of_backoff():
+    factory, calls = _flaky([_APIError(status_code=429, headers={"retry-after-ms": "200"})])
+    policy = RetryPolicy(max_attempts=3, base_delay=5, max_delay=5, budget=5)
+    assert asyncio.run(policy.run(factory)) == "ok"
+    assert 0.2 <= calls[1] - calls[0] < 1
+
+def test_run_stops_when_the_wait_would_exceed_the_budget():
+    factory, calls = _flaky([_APIError(status_code=429, headers={"retry-after": "2"})])
+    policy = RetryPolicy(max_attempts=3, budget=0.5)
+    started = time.monotonic()
+    with pytest.raises(_APIError):
+        asyncio.run(policy.run(factory))
+    # Gave up straight away instead of sleeping past the budget
+    assert len(calls) == 1
+    assert time.monotonic() - started < 0.5
+
+def test_run_times_out_a_slow_attempt_at_the_budget():
+    async def slow():
+        await asyncio.sleep(5)
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01, budget=0.2)
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(policy.run(slow))
+    assert time.monotonic() - started < 1
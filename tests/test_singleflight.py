@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from utils.singleflight import SingleFlight
+
+def test_cancelled_leader_does_not_cancel_joined_waiters():
+    async def run():
+        group = SingleFlight("test-cancel")
+        release = asyncio.Event()
+        calls = 0
+
+        async def factory():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "result"
+
+        leader = asyncio.create_task(group.do("key", factory))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(group.do("key", factory))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await follower == "result"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert calls == 1
+    asyncio.run(run())
+
+def test_error_reaches_every_waiter():
+    async def run():
+        group = SingleFlight("test-error")
+        release = asyncio.Event()
+
+        async def factory():
+            await release.wait()
+            raise ValueError("upstream failed")
+
+        waiters = [asyncio.create_task(group.do("key", factory)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert group.stats()["started"] == 1
+        assert group.stats()["coalesced"] == 2
+    asyncio.run(run())
+
+def test_in_flight_entry_is_cleared():
+    async def run():
+        group = SingleFlight("test-clear")
+
+        async def succeed():
+            return "ok"
+
+        async def fail():
+            raise ValueError("upstream failed")
+
+        assert await group.do("ok", succeed) == "ok"
+        with pytest.raises(ValueError):
+            await group.do("fail", fail)
+        assert group.stats()["in_flight"] == 0
+
+        # Once every waiter is cancelled the call is dropped and the next caller starts afresh
+        never = asyncio.Event()
+
+        async def hang():
+            await never.wait()
+
+        waiter = asyncio.create_task(group.do("hang", hang))
+        await asyncio.sleep(0)
+        assert group.stats()["in_flight"] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert group.stats()["in_flight"] == 0
+        assert await group.do("hang", succeed) == "ok"
+    asyncio.run(run())
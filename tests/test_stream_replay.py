@@ -0,0 +1,39 @@
+import asyncio
+import json
+from providers.engine import RecommendationEngine
+
+CONTENT_HASH = "cd" * 32
+
+def _events(engine: RecommendationEngine, request) -> list:
+    async def collect():
+        events = []
+        async for chunk in engine.stream(request, "fake"):
+            event, data = chunk.decode().strip().split("\n")
+            events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+        return events
+    return asyncio.run(collect())
+
+def test_cached_stream_replays_image_events(fake_provider, travel_request):
+    provider = fake_provider(cities=["Lisbon", "Porto"], content_hash=CONTENT_HASH)
+    engine = RecommendationEngine([provider], hedging=False, failover=False)
+    request = travel_request()
+    live = _events(engine, request)
+    replayed = _events(engine, request)
+
+    image_events = [data for event, data in replayed if event == "image"]
+    assert [data["index"] for data in image_events] == [0, 1]
+    assert all(data["imageUrl"].endswith(f"/images/{CONTENT_HASH}") for data in image_events)
+    # Same events as the live stream, which may interleave images with destinations
+    key = lambda item: json.dumps(item, sort_keys=True)
+    assert sorted(replayed, key=key) == sorted(live, key=key)
+    assert replayed[-1] == ("done", {"count": 2})
+
+def test_provider_without_streaming_sends_its_completion_as_one_chunk(fake_provider, travel_request):
+    provider = fake_provider(cities=["Lisbon", "Porto"], supports_streaming=False)
+    engine = RecommendationEngine([provider], hedging=False, failover=False)
+
+    events = _events(engine, travel_request("Non-streaming"))
+    destinations = [data["destination"]["city"] for event, data in events if event == "destination"]
+    assert destinations == ["Lisbon", "Porto"]
+    assert [event for event, _ in events].count("image") == 2
+    assert events[-1] == ("done", {"count": 2})
@@ -0,0 +1,58 @@
+import asyncio
+import os
+from utils.deadline import DeadlineExceeded
+
+# Image generation limits: per recommendation request, and per provider
+# across all requests in this worker
+IMAGE_CONCURRENCY_PER_REQUEST = int(os.getenv("IMAGE_CONCURRENCY_PER_REQUEST", "3"))
+IMAGE_CONCURRENCY_GLOBAL = int(os.getenv("IMAGE_CONCURRENCY_GLOBAL", "8"))
+
+async def run_bounded(factory, local_semaphore: asyncio.Semaphore, global_semaphore: asyncio.Semaphore | None = None):
+    """Await factory() while holding a per-request slot and, if given, a global one"""
+    # Take the per-request slot first so one request cannot hoard global slots
+    async with local_semaphore:
+        if global_semaphore is None:
+            return await factory()
+        async with global_semaphore:
+            return await factory()
+
+async def gather_bounded(
+    factories,
+    limit: int,
+    global_semaphore: asyncio.Semaphore | None = None,
+    timeout: float | None = None
+) -> list:
+    """Run coroutine factories concurrently and return their results in input order.
+
+    At most `limit` run at once for this call, and global_semaphore (shared
+    across calls) caps the total. A failing call does not affect the others:
+    its exception is returned in its slot instead of being raised. Calls
+    still running after `timeout` seconds are cancelled and get a
+    DeadlineExceeded in their slot.
+    """
+    local_semaphore = asyncio.Semaphore(limit)
+    tasks = [
+        asyncio.ensure_future(run_bounded(factory, local_semaphore, global_semaphore))
+        for factory in factories
+    ]
+    if not tasks:
+        return []
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+    finally:
+        # Also reached when the caller is cancelled; stop work nobody will read
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    results = []
+    for task in tasks:
+        if task in pending:
+            results.append(DeadlineExceeded("Cancelled at the request deadline"))
+        elif task.cancelled():
+            results.append(asyncio.CancelledError())
+        elif task.exception() is not None:
+            results.append(task.exception())
+        else:
+            results.append(task.result())
+    return results
@@ -0,0 +1,17 @@
+import base64
+import re
+
+_DATA_URI_PATTERN = re.compile(r"^data:(?P<mime>[\w.+-]+/[\w.+-]+);base64,(?P<data>.*)$", re.DOTALL)
+
+def to_data_uri(data: bytes, mime_type: str) -> str:
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+def parse_data_uri(value: str | None) -> tuple[bytes, str] | None:
+    """Decode a base64 data: URI into (bytes, mime type), or None if it is not one"""
+    match = _DATA_URI_PATTERN.match(value or "")
+    if not match:
+        return None
+    try:
+        return base64.b64decode(match.group("data"), validate=True), match.group("mime")
+    except ValueError:
+        return None
@@ -0,0 +1,52 @@
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# End-to-end budget for a recommendation request, text and images included
+RECOMMENDATION_DEADLINE_SECONDS = float(os.getenv("RECOMMENDATION_DEADLINE_SECONDS", "60"))
+
+# Absolute time.monotonic() value after which nobody is waiting for the result.
+# Tasks created inside the scope copy it, so it follows work into gathers and
+# single-flight calls.
+_deadline_at: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """The current request's deadline passed before the work finished"""
+
+@contextmanager
+def request_deadline(seconds: float):
+    """Set a deadline for everything awaited inside the block; nested scopes only tighten it"""
+    deadline_at = time.monotonic() + seconds
+    current = _deadline_at.get()
+    if current is not None:
+        deadline_at = min(deadline_at, current)
+    token = _deadline_at.set(deadline_at)
+    try:
+        yield
+    finally:
+        _deadline_at.reset(token)
+
+def deadline_at() -> float | None:
+    """The current deadline as a time.monotonic() value, or None if unbounded"""
+    return _deadline_at.get()
+
+def remaining() -> float | None:
+    """Seconds left before the current deadline, or None if unbounded"""
+    current = _deadline_at.get()
+    if current is None:
+        return None
+    return max(current - time.monotonic(), 0.0)
+
+async def with_deadline(awaitable):
+    """Await within the current deadline, cancelling it and raising DeadlineExceeded when it passes"""
+    timeout = remaining()
+    if timeout is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        if remaining() == 0:
+            raise DeadlineExceeded("Request deadline exceeded") from None
+        raise
@@ -0,0 +1,23 @@
+import asyncio
+from fastapi import HTTPException, Request
+
+async def run_until_disconnect(request: Request, coro, poll_interval: float = 0.5):
+    """Await coro, cancelling it as soon as the HTTP client disconnects.
+
+    Long upstream calls (LLM completions, image generation) are abandoned
+    instead of running to completion for a response nobody will read.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                print("Client disconnected, cancelling request")
+                task.cancel()
+                # 499: client closed request; nobody will read this response
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
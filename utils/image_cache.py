@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from fastapi import Request
+
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "data/image_cache")
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Cache hits only touch last_access, so the index is rewritten for them at
+# most this often instead of on every lookup
+IMAGE_CACHE_INDEX_FLUSH_SECONDS = float(os.getenv("IMAGE_CACHE_INDEX_FLUSH_SECONDS", "30"))
+# Public origin of this API, used to build absolute image URLs. When unset the
+# origin of the current request is used.
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
+
+# Set by recommendation handlers to the base URL of the incoming request
+request_base_url: ContextVar[str] = ContextVar("request_base_url", default="")
+
+def image_cache_key(provider: str, city: str, location: str | None, is_us_state: bool) -> str:
+    """Normalize the inputs that determine an image prompt into a cache key"""
+    def normalize(value):
+        return " ".join((value or "").split()).casefold()
+    raw = "|".join([provider, normalize(city), normalize(location), "us" if is_us_state else "intl"])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+# Cached trips and recommendations hold host-relative image paths or content
+# hashes; the origin depends on the request, so absolute URLs are only built
+# when a response is rendered
+IMAGE_PATH_PREFIX = "/images/"
+
+def absolute_image_url(link: str | None) -> str | None:
+    """Prefix a host-relative /images/ path with this request's origin; other links pass through"""
+    if link is None or not link.startswith(IMAGE_PATH_PREFIX):
+        return link
+    base_url = PUBLIC_BASE_URL or request_base_url.get().rstrip("/")
+    return base_url + link
+
+def image_url(content_hash: str) -> str:
+    """Absolute URL of a stored image, served by routes/image_route.py"""
+    return absolute_image_url(IMAGE_PATH_PREFIX + content_hash)
+
+def stored_image_url(stored: str | None) -> str | None:
+    """URL for a content hash; data URIs (stored inline) and None pass through"""
+    if stored is None or stored.startswith("data:"):
+        return stored
+    return image_url(stored)
+
+async def bind_request_base_url(request: Request):
+    """App-wide dependency that records the request's base URL for image_url()"""
+    request_base_url.set(str(request.base_url))
+
+_IMAGE_URL_PATTERN = re.compile(r"/images/(?P<hash>[0-9a-f]{64})$")
+
+def parse_image_url(value: str | None) -> str | None:
+    """Return the content hash if value is one of our /images/{hash} URLs"""
+    match = _IMAGE_URL_PATTERN.search(value or "")
+    return match.group("hash") if match else None
+
+class ImageCache:
+    """Content-addressed on-disk image cache with an in-memory LRU index.
+
+    Blobs are stored once per content hash under <directory>/blobs, and several
+    keys may point at the same blob. The index (key -> hash, mime type, size)
+    lives in memory and is persisted to index.json so the cache survives
+    restarts; access times from hits are flushed at most every flush_interval
+    seconds. When the blobs exceed max_bytes, least recently used keys are
+    evicted and unreferenced blobs deleted, including on load if max_bytes
+    has been lowered since the index was written.
+
+    GET /images/{content_hash} serves blobs from here when present. Evicted
+    blobs are still served from the images table, which holds every image
+    whose URL has been handed out (see utils/image_store.py).
+    """
+
+    def __init__(self, directory: str, max_bytes: int, flush_interval: float = IMAGE_CACHE_INDEX_FLUSH_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._blob_dir = os.path.join(directory, "blobs")
+        self._index_path = os.path.join(directory, "index.json")
+        self._index = OrderedDict()
+        self._blob_refs = {}
+        self._blob_sizes = {}
+        self._blob_mimes = {}
+        self._total_bytes = 0
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "writes": 0}
+        os.makedirs(self._blob_dir, exist_ok=True)
+        self._load()
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self._blob_dir, content_hash)
+
+    def _load(self):
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Ignoring unreadable image cache index: {str(e)}")
+            return
+        for key, entry in sorted(entries.items(), key=lambda item: item[1].get("last_access", 0)):
+            if os.path.exists(self._blob_path(entry["hash"])):
+                self._add_entry(key, entry)
+        if self._evict():
+            self._save()
+
+    def _save(self):
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _evict(self) -> bool:
+        """Drop least recently used keys until the blobs fit in max_bytes"""
+        evicted = False
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            oldest_key = next(iter(self._index))
+            self._remove_entry(oldest_key)
+            self._stats["evictions"] += 1
+            evicted = True
+        return evicted
+
+    def _add_entry(self, key, entry):
+        self._index[key] = entry
+        content_hash = entry["hash"]
+        if content_hash not in self._blob_refs:
+            self._blob_refs[content_hash] = 0
+            self._blob_sizes[content_hash] = entry["size"]
+            self._blob_mimes[content_hash] = entry["mime"]
+            self._total_bytes += entry["size"]
+        self._blob_refs[content_hash] += 1
+
+    def _remove_entry(self, key):
+        entry = self._index.pop(key)
+        content_hash = entry["hash"]
+        self._blob_refs[content_hash] -= 1
+        if self._blob_refs[content_hash] == 0:
+            del self._blob_refs[content_hash]
+            self._total_bytes -= self._blob_sizes.pop(content_hash)
+            self._blob_mimes.pop(content_hash, None)
+            try:
+                os.remove(self._blob_path(content_hash))
+            except FileNotFoundError:
+                pass
+
+    def get_hash(self, key: str) -> str | None:
+        """Return the content hash cached for key without reading the blob"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or not os.path.exists(self._blob_path(entry["hash"])):
+                if entry is not None:
+                    self._remove_entry(key)
+                    self._dirty = True
+                self._stats["misses"] += 1
+                return None
+            entry["last_access"] = time.time()
+            self._index.move_to_end(key)
+            self._stats["hits"] += 1
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= self.flush_interval:
+                self._save()
+            return entry["hash"]
+
+    def flush(self):
+        """Persist access times recorded since the index was last written"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def blob_info(self, content_hash: str) -> tuple[str, str, int] | None:
+        """Return (path, mime type, size) of a stored blob, or None if unknown"""
+        with self._lock:
+            mime_type = self._blob_mimes.get(content_hash)
+            if mime_type is None:
+                return None
+            return self._blob_path(content_hash), mime_type, self._blob_sizes[content_hash]
+
+    def put(self, key: str, data: bytes, mime_type: str) -> str:
+        """Store image bytes under key and return their content hash"""
+        content_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if content_hash not in self._blob_refs:
+                tmp_path = self._blob_path(content_hash) + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self._blob_path(content_hash))
+            if key in self._index:
+                self._remove_entry(key)
+            self._add_entry(key, {
+                "hash": content_hash,
+                "mime": mime_type,
+                "size": len(data),
+                "last_access": time.time(),
+            })
+            self._stats["writes"] += 1
+            self._evict()
+            self._save()
+        return content_hash
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats.update({
+                "entries": len(self._index),
+                "blobs": len(self._blob_refs),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            })
+        return stats
+
+image_cache = ImageCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES)
@@ -0,0 +1,143 @@
+import asyncio
+import contextvars
+import os
+import time
+import uuid
+from collections import deque
+
+IMAGE_JOB_WORKERS = int(os.getenv("IMAGE_JOB_WORKERS", "4"))
+IMAGE_JOB_QUEUE_SIZE = int(os.getenv("IMAGE_JOB_QUEUE_SIZE", "100"))
+# How long finished results stay pollable
+IMAGE_JOB_RESULT_TTL = float(os.getenv("IMAGE_JOB_RESULT_TTL", "600"))
+
+class ImageJob:
+    __slots__ = ("id", "key", "status", "result", "finished_at", "_factory", "_done")
+
+    def __init__(self, key: str, factory):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = "pending"
+        self.result = None
+        self.finished_at = None
+        self._factory = factory
+        self._done = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+class ImageJobQueue:
+    """Background image generation with a bounded queue and a fixed worker pool.
+
+    Jobs are deduplicated by key: submitting a key that is queued, running or
+    recently finished returns the existing job. A job's result is whatever
+    its factory returned; finished jobs are forgotten after result_ttl.
+    Workers start on the first submit, on the running event loop.
+    """
+
+    def __init__(self, workers: int, max_queue: int, result_ttl: float):
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._worker_tasks = []
+        self._jobs = {}
+        self._by_key = {}
+        self._finished = deque()
+        self._submitted = 0
+        self._deduplicated = 0
+        self._rejected = 0
+        self._failed = 0
+
+    def submit(self, key: str, factory) -> ImageJob | None:
+        """Queue factory() under key, or return None if the queue is full"""
+        self._expire()
+        job = self._by_key.get(key)
+        if job is not None and job.status != "failed":
+            self._deduplicated += 1
+            return job
+
+        self._ensure_workers()
+        job = ImageJob(key, factory)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._rejected += 1
+            return None
+        self._jobs[job.id] = job
+        self._by_key[key] = job
+        self._submitted += 1
+        return job
+
+    def get(self, job_id: str) -> ImageJob | None:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> ImageJob | None:
+        """Return the job once finished or after timeout seconds, whichever is first"""
+        job = self.get(job_id)
+        if job is not None and not job.finished and timeout > 0:
+            try:
+                await asyncio.wait_for(job._done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    def _ensure_workers(self):
+        if self._worker_tasks:
+            return
+        # Workers outlive the request whose submit started them, so they must not
+        # inherit its context vars: a copied request deadline would expire every
+        # later job. create_task copies the current context, so call it from an
+        # empty one (the context= argument would need Python 3.11)
+        self._worker_tasks = [
+            contextvars.Context().run(asyncio.create_task, self._worker())
+            for _ in range(self.workers)
+        ]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            try:
+                job.result = await job._factory()
+                job.status = "done" if job.result is not None else "failed"
+            except Exception as e:
+                print(f"Image job {job.id} failed: {str(e)}")
+                job.status = "failed"
+            finally:
+                if job.status == "failed":
+                    self._failed += 1
+                job._factory = None
+                job.finished_at = time.monotonic()
+                self._finished.append(job)
+                job._done.set()
+                self._queue.task_done()
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.result_ttl
+        while self._finished and self._finished[0].finished_at <= cutoff:
+            job = self._finished.popleft()
+            self._jobs.pop(job.id, None)
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+
+    async def close(self):
+        """Cancel the workers; queued jobs are dropped"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def stats(self):
+        return {
+            "workers": len(self._worker_tasks),
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "tracked": len(self._jobs),
+            "submitted": self._submitted,
+            "deduplicated": self._deduplicated,
+            "rejected": self._rejected,
+            "failed": self._failed,
+        }
+
+image_jobs = ImageJobQueue(IMAGE_JOB_WORKERS, IMAGE_JOB_QUEUE_SIZE, IMAGE_JOB_RESULT_TTL)
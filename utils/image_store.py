@@ -0,0 +1,26 @@
+import asyncio
+import hashlib
+from database import get_async_db_cursor
+from utils.image_cache import image_cache
+
+async def save_generated_image(cache_key: str, data: bytes, mime_type: str) -> str:
+    """Store a newly generated image and return its content hash.
+
+    The images table is the durable copy behind GET /images/{hash}, so a URL
+    that was handed out keeps working after the local cache evicts the blob or
+    the disk is lost; the local copy only saves a database read. Raises if the
+    database write fails, in which case the image must not be referenced by URL.
+    """
+    content_hash = hashlib.sha256(data).hexdigest()
+    async with get_async_db_cursor() as cursor:
+        await cursor.execute("""
+            INSERT INTO images (contentHash, mimeType, data)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (contentHash) DO NOTHING
+        """, [content_hash, mime_type, data])
+    try:
+        await asyncio.to_thread(image_cache.put, cache_key, data, mime_type)
+    except OSError as e:
+        # Still served from the images table
+        print(f"Failed to cache image {content_hash} locally: {str(e)}")
+    return content_hash
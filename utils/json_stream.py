@@ -0,0 +1,70 @@
+import json
+import re
+
+class JSONArrayStreamParser:
+    """Incrementally extract the objects of one JSON array from streamed text.
+
+    Model output is fed in arbitrary chunks. Once the array under `key` has
+    started, each element object is returned from feed() as soon as its
+    closing brace arrives, without waiting for the rest of the document.
+    Text around the array (markdown fences, other keys) is ignored.
+    """
+
+    def __init__(self, key: str):
+        self._key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self.finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start = None
+
+    def feed(self, chunk: str) -> list:
+        """Consume a chunk and return any array elements it completed"""
+        if self.finished or not chunk:
+            return []
+        self._buffer += chunk
+
+        if not self._started:
+            match = self._key_pattern.search(self._buffer)
+            if not match:
+                return []
+            self._started = True
+            self._pos = match.end()
+
+        items = []
+        buffer = self._buffer
+        for index in range(self._pos, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._item_start = index
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the array itself
+                    self.finished = True
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    items.append(json.loads(buffer[self._item_start:index + 1]))
+                    self._item_start = None
+
+        # Keep only the unfinished element so the buffer does not grow unbounded
+        keep_from = self._item_start if self._item_start is not None else len(buffer)
+        self._buffer = buffer[keep_from:]
+        if self._item_start is not None:
+            self._item_start = 0
+        self._pos = len(self._buffer)
+        return items
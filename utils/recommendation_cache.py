@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+from datetime import date
+from models.destination import TravelRequest
+from utils.cache import TTLCache
+
+RECOMMENDATION_CACHE_MAXSIZE = int(os.getenv("RECOMMENDATION_CACHE_MAXSIZE", "1000"))
+RECOMMENDATION_CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL", "3600"))
+
+# Trip lengths that produce interchangeable recommendations
+_TRIP_LENGTH_BUCKETS = [(3, "short"), (7, "week"), (14, "two-weeks")]
+
+def _normalize(value: str | None) -> str:
+    return " ".join((value or "").split()).casefold()
+
+def _normalize_list(values: list[str]) -> list[str]:
+    return sorted({_normalize(value) for value in values if _normalize(value)})
+
+def _date_bucket(start: str, end: str) -> dict:
+    """Bucket travel dates by start month and trip length instead of exact days"""
+    try:
+        start_date = date.fromisoformat(start[:10])
+        end_date = date.fromisoformat(end[:10])
+    except ValueError:
+        return {"start": _normalize(start), "end": _normalize(end)}
+    days = (end_date - start_date).days + 1
+    length = next((label for limit, label in _TRIP_LENGTH_BUCKETS if days <= limit), "long")
+    return {"month": start_date.strftime("%Y-%m"), "length": length}
+
+def canonical_request_key(request: TravelRequest) -> str:
+    """Hash a TravelRequest so near-identical submissions share a cache entry.
+
+    Preference lists are order-insensitive, locations are case- and
+    whitespace-insensitive, and dates are bucketed.
+    """
+    basic_info = request.basicInfo
+    canonical = {
+        "isSpecificPlace": basic_info.isSpecificPlace,
+        "place": _normalize(basic_info.specificPlace if basic_info.isSpecificPlace else basic_info.destination),
+        "dates": _date_bucket(basic_info.startDate, basic_info.endDate),
+        "travelers": basic_info.travelers,
+        "tripStyles": _normalize_list(request.travelPreferences.tripStyles),
+        "accommodation": _normalize_list(request.travelPreferences.accommodation),
+        "transportation": _normalize_list(request.travelPreferences.transportation),
+        "dining": _normalize_list(request.diningPreferences),
+        "activities": _normalize_list(request.activities),
+    }
+    raw = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class RecommendationCache:
+    """TTL+LRU cache of recommendation responses, namespaced per provider"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._namespaces = {}
+
+    def namespace(self, provider: str) -> TTLCache:
+        if provider not in self._namespaces:
+            self._namespaces[provider] = TTLCache(maxsize=self.maxsize, ttl=self.ttl)
+        return self._namespaces[provider]
+
+    def stats(self):
+        return {provider: cache.stats() for provider, cache in self._namespaces.items()}
+
+recommendation_cache = RecommendationCache(RECOMMENDATION_CACHE_MAXSIZE, RECOMMENDATION_CACHE_TTL)
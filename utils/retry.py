@@ -0,0 +1,112 @@
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+import httpx
+from utils.deadline import deadline_at
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.5"))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "8"))
+# Total time one call may spend across all of its attempts and waits
+RETRY_TEXT_BUDGET_SECONDS = float(os.getenv("RETRY_TEXT_BUDGET_SECONDS", "120"))
+RETRY_IMAGE_BUDGET_SECONDS = float(os.getenv("RETRY_IMAGE_BUDGET_SECONDS", "120"))
+
+# Throttling, timeouts and transient server failures
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+class RetryableError(Exception):
+    """Raised by a call for a transient bad result, e.g. a response without an image"""
+
+def _status_code(error: Exception) -> int | None:
+    # OpenAI errors carry status_code, google-genai errors carry code
+    for attribute in ("status_code", "code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+def is_retryable(error: BaseException | None) -> bool:
+    """Whether a failed upstream call is worth repeating"""
+    if error is None:
+        return False
+    if isinstance(error, (RetryableError, asyncio.TimeoutError, TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        # An exhausted quota is also a 429, but waiting will not fix it
+        if status == 429 and "insufficient_quota" in str(error):
+            return False
+        return status in RETRYABLE_STATUS_CODES
+    # SDK connection errors wrap the underlying transport error
+    return is_retryable(error.__cause__)
+
+def retry_after_seconds(error: Exception) -> float | None:
+    """Delay requested by the server through Retry-After(-Ms) headers, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return max(float(value) / 1000, 0.0)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class RetryPolicy:
+    """Retry an async call with capped exponential backoff and full jitter.
+
+    Only retryable failures are repeated, a server's Retry-After wins over the
+    computed backoff, and the whole call (attempts plus waits) must finish
+    within `budget` seconds and before the request deadline, if one is set;
+    once it cannot, the last error is raised.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY_SECONDS,
+        max_delay: float = RETRY_MAX_DELAY_SECONDS,
+        budget: float = RETRY_TEXT_BUDGET_SECONDS
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def run(self, factory, description: str = "Upstream call"):
+        """Await factory(), calling it again after retryable failures"""
+        deadline = time.monotonic() + self.budget
+        # Never outlive the request that is waiting for this call
+        request_deadline = deadline_at()
+        if request_deadline is not None:
+            deadline = min(deadline, request_deadline)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await asyncio.wait_for(factory(), max(deadline - time.monotonic(), 0))
+            except Exception as e:
+                if attempt >= self.max_attempts or not is_retryable(e):
+                    raise
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = self.backoff(attempt)
+                if time.monotonic() + delay >= deadline:
+                    raise
+                print(f"{description} failed (attempt {attempt}/{self.max_attempts}): {str(e)}; retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+text_retry_policy = RetryPolicy(budget=RETRY_TEXT_BUDGET_SECONDS)
+image_retry_policy = RetryPolicy(budget=RETRY_IMAGE_BUDGET_SECONDS)
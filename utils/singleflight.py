@@ -0,0 +1,68 @@
+import asyncio
+
+_groups = []
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one upstream call.
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight await the same task and receive the same result or exception.
+    The call is shielded from any single caller being cancelled and is only
+    cancelled once every caller waiting on it has gone away. Nothing is
+    remembered after the call finishes; caching is left to the caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self._started = 0
+        self._coalesced = 0
+        _groups.append(self)
+
+    async def do(self, key, factory):
+        """Await factory() for key, joining an identical call already in flight"""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task, key=key, call=call: self._forget(key, call))
+            self._started += 1
+        else:
+            self._coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Forget it now so a new caller starts fresh instead of joining a dying call
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Retrieve the outcome so an abandoned call does not log "never retrieved"
+        if call.task.done() and not call.task.cancelled():
+            call.task.exception()
+
+    def stats(self):
+        total = self._started + self._coalesced
+        return {
+            "in_flight": len(self._calls),
+            "started": self._started,
+            "coalesced": self._coalesced,
+            "coalesce_rate": self._coalesced / total if total else 0.0,
+        }
+
+def singleflight_stats():
+    """Return counters for every SingleFlight group, keyed by name"""
+    return {group.name: group.stats() for group in _groups}